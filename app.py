@@ -1,14 +1,24 @@
 import streamlit as st
 import pandas as pd
-import pickle
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 import numpy as np
-from models.prophet_model import train_prophet_model, forecast_aqi
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
-import base64
+from models.registry import ModelRegistry
+from utils.store import SCHEMA, load_frame, store_signature
+from utils.query import date_range, fetch_page, filter_positions
+from utils.rollups import (
+    AQI_BIN_WIDTH, aqi_category_counts, aqi_histogram, build_rollups, monthly_means, range_summary, update_rollups
+)
+from utils.records import RecordStore, apply_records, dataset_version
+from utils.search import MonthlySearchIndex
+from utils.downsample import minmax_indices
+from utils.export import EXPORT_FORMATS, export_file
+from utils.aqi import CATEGORY_COLORS, categorize, category_info
+from functools import partial
+import threading
+
+# Heavier dependencies (plotly, scikit-learn, Prophet, the forecast scheduler) are
+# imported by the pages and loaders that need them, so the welcome page and a
+# fresh worker's first run don't pay for them
 
 # Set page configuration
 st.set_page_config(
@@ -18,6 +28,101 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Model loading: one registry per process, shared by every session
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
+
+@st.cache_resource(max_entries=2)
+def load_predictor(version, _model):
+    from models.compiled_forest import CompiledForest, can_compile
+    
+    # Forests are compiled to flat arrays once per model version for fast single-row predictions
+    return CompiledForest.from_sklearn(_model) if can_compile(_model) else _model
+
+# Data loading
+@st.cache_resource
+def get_record_store():
+    return RecordStore()
+
+# Frames are shared, not copied, between sessions: pages must treat them as read-only
+@st.cache_resource(max_entries=4)
+def load_base(columns=None, signature=None):
+    # The store's (mtime, rows) signature is part of the key, so a rebuilt store is reloaded
+    return load_frame(columns)
+
+@st.cache_data
+def load_partition(month, version):
+    # The version is part of the cache key, so a write only invalidates its own month
+    return get_record_store().read_partition(month)
+
+def load_records(versions):
+    if not versions:
+        return pd.DataFrame(columns=SCHEMA.names)
+    return pd.concat([load_partition(month, version) for month, version in versions], ignore_index=True)
+
+@st.cache_resource(max_entries=4)
+def load_data(columns=None, signature=None, versions=(), data_version=None):
+    data = apply_records(load_base(columns, signature), load_records(versions))
+    # Expensive computations downstream key their caches on this token instead of hashing rows
+    data.attrs["version"] = data_version
+    data.attrs["signature"] = signature
+    data.attrs["partition_versions"] = versions
+    return data
+
+@st.cache_resource
+def get_forecast_scheduler():
+    # One refresh thread per process; it refits only when the dataset version changes.
+    # With FORECAST_WORKER=external the scheduler only reads the worker's forecast file.
+    # The thread is started by the Forecast page: its first fit imports the backend
+    # (Prophet), which no other page needs
+    from models.scheduler import ForecastScheduler
+    
+    return ForecastScheduler(get_record_store())
+
+@st.cache_resource
+def search_index_state():
+    return {"lock": threading.Lock(), "version": None, "index": None}
+
+def load_search_index(data):
+    # One index per process, built on the first search. A new dataset version
+    # only re-indexes the months whose record partitions changed
+    state = search_index_state()
+    with state["lock"]:
+        if state["index"] is None or state["version"] != data.attrs["version"]:
+            state["index"] = MonthlySearchIndex(
+                data, data.attrs["signature"], dict(data.attrs["partition_versions"]), previous=state["index"]
+            )
+            state["version"] = data.attrs["version"]
+        return state["index"]
+
+# Formatted once per dataset version for the Data Table search
+@st.cache_resource(max_entries=2)
+def load_date_strings(data_version, _data):
+    return _data["Datetime"].dt.strftime("%Y-%m-%d")
+
+@st.cache_resource
+def rollup_state():
+    return {"lock": threading.Lock(), "signature": None, "versions": None, "rollups": None}
+
+def load_rollups(data, signature, versions):
+    """Rollups for the full-column ``data``, updated in place as record partitions change."""
+    if data.empty:
+        return None
+    
+    state = rollup_state()
+    with state["lock"]:
+        if state["rollups"] is None or state["signature"] != signature:
+            state["rollups"] = build_rollups(data)
+        elif state["versions"] != versions:
+            # Only rescan the months whose records changed since the last build
+            previous = dict(state["versions"])
+            changed = tuple((month, version) for month, version in versions if previous.get(month) != version)
+            state["rollups"] = update_rollups(state["rollups"], data, load_records(changed))
+        state["signature"] = signature
+        state["versions"] = versions
+        return state["rollups"]
+
 # Custom CSS for better styling
 def apply_custom_css():
     st.markdown("""
@@ -444,11 +549,7 @@ def create_sidebar():
             )
         
         # Rating section
-        st.markdown('<div class="sidebar-title" style="font-size: 18px; margin-top: 20px;">⭐ Rate Us</div>', unsafe_allow_html=True)
-        rating = st.slider("How would you rate our app?", 0, 10, 7)
-        
-        if rating > 0:
-            st.success(f"Thank you for your rating of {rating}/10! 😊")
+        rating_section()
         
         # Footer
         st.markdown(
@@ -462,7 +563,18 @@ def create_sidebar():
     
     return selected
 
-def visualize_page(data):
+# Moving the rating slider only reruns this section
+@st.fragment
+def rating_section():
+    st.markdown('<div class="sidebar-title" style="font-size: 18px; margin-top: 20px;">⭐ Rate Us</div>', unsafe_allow_html=True)
+    rating = st.slider("How would you rate our app?", 0, 10, 7)
+    
+    if rating > 0:
+        st.success(f"Thank you for your rating of {rating}/10! 😊")
+
+def visualize_page(data, rollups):
+    import plotly.express as px
+    
     st.markdown('<h1 class="dashboard-title">Air Quality Visualization</h1>', unsafe_allow_html=True)
     
     if data.empty:
@@ -473,113 +585,13 @@ def visualize_page(data):
     tab1, tab2, tab3 = st.tabs(["📈 Time Series", "📊 Statistics", "🗺️ Data Table"])
     
     with tab1:
-        st.markdown('<div class="section-header">Historical AQI Trends</div>', unsafe_allow_html=True)
-        
-        # Date range selector
-        col1, col2 = st.columns(2)
-        with col1:
-            start_date = st.date_input(
-                "Start Date",
-                value=data["Datetime"].min().date(),
-                min_value=data["Datetime"].min().date(),
-                max_value=data["Datetime"].max().date()
-            )
-        with col2:
-            end_date = st.date_input(
-                "End Date",
-                value=data["Datetime"].max().date(),
-                min_value=data["Datetime"].min().date(),
-                max_value=data["Datetime"].max().date()
-            )
-        
-        # Filter data based on date range
-        filtered_data = data[(data["Datetime"].dt.date >= start_date) & 
-                             (data["Datetime"].dt.date <= end_date)]
-        
-        # Create interactive time series plot with Plotly
-        fig = px.line(
-            filtered_data, 
-            x="Datetime", 
-            y="AQI",
-            title="Air Quality Index Over Time",
-            labels={"AQI": "Air Quality Index", "Datetime": "Date"},
-            line_shape="spline",
-            template="plotly_white"
-        )
-        
-        fig.update_layout(
-            height=500,
-            hovermode="x unified",
-            xaxis_title="Date",
-            yaxis_title="AQI Value",
-            legend_title="Legend",
-            font=dict(family="Arial", size=12),
-            margin=dict(l=40, r=40, t=40, b=40),
-        )
-        
-        # Add AQI threshold lines
-        thresholds = [
-            {"value": 50, "name": "Good", "color": "green"},
-            {"value": 100, "name": "Moderate", "color": "yellow"},
-            {"value": 150, "name": "Unhealthy for Sensitive Groups", "color": "orange"},
-            {"value": 200, "name": "Unhealthy", "color": "red"},
-            {"value": 300, "name": "Very Unhealthy", "color": "purple"}
-        ]
-        
-        for threshold in thresholds:
-            fig.add_shape(
-                type="line",
-                x0=filtered_data["Datetime"].min(),
-                y0=threshold["value"],
-                x1=filtered_data["Datetime"].max(),
-                y1=threshold["value"],
-                line=dict(color=threshold["color"], width=1, dash="dash"),
-            )
-            
-            fig.add_annotation(
-                x=filtered_data["Datetime"].max(),
-                y=threshold["value"],
-                text=threshold["name"],
-                showarrow=False,
-                xshift=10,
-                font=dict(size=10, color=threshold["color"])
-            )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Monthly average AQI
-        if len(filtered_data) > 30:  # Only show if we have enough data
-            st.markdown('<div class="section-header">Monthly Average AQI</div>', unsafe_allow_html=True)
-            
-            # Extract month and year from datetime
-            filtered_data['Month'] = filtered_data['Datetime'].dt.strftime('%b %Y')
-            monthly_avg = filtered_data.groupby('Month')['AQI'].mean().reset_index()
-            
-            fig = px.bar(
-                monthly_avg, 
-                x='Month', 
-                y='AQI',
-                title='Monthly Average AQI',
-                labels={'AQI': 'Average AQI', 'Month': 'Month'},
-                color='AQI',
-                color_continuous_scale=px.colors.sequential.Viridis,
-                template="plotly_white"
-            )
-            
-            fig.update_layout(
-                height=400,
-                xaxis_title="Month",
-                yaxis_title="Average AQI",
-                font=dict(family="Arial", size=12),
-                margin=dict(l=40, r=40, t=40, b=40),
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        time_series_section(data, rollups)
     
     with tab2:
         st.markdown('<div class="section-header">AQI Statistics</div>', unsafe_allow_html=True)
         
         # Summary statistics
+        summary = range_summary(rollups, 'AQI')
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
@@ -587,7 +599,7 @@ def visualize_page(data):
                 f"""
                 <div class="metric-card">
                     <div class="metric-label">Average AQI</div>
-                    <div class="metric-value" style="color: #2563EB;">{data['AQI'].mean():.1f}</div>
+                    <div class="metric-value" style="color: #2563EB;">{summary['mean']:.1f}</div>
                 </div>
                 """, 
                 unsafe_allow_html=True
@@ -598,7 +610,7 @@ def visualize_page(data):
                 f"""
                 <div class="metric-card">
                     <div class="metric-label">Maximum AQI</div>
-                    <div class="metric-value" style="color: #DC2626;">{data['AQI'].max():.1f}</div>
+                    <div class="metric-value" style="color: #DC2626;">{summary['max']:.1f}</div>
                 </div>
                 """, 
                 unsafe_allow_html=True
@@ -609,7 +621,7 @@ def visualize_page(data):
                 f"""
                 <div class="metric-card">
                     <div class="metric-label">Minimum AQI</div>
-                    <div class="metric-value" style="color: #10B981;">{data['AQI'].min():.1f}</div>
+                    <div class="metric-value" style="color: #10B981;">{summary['min']:.1f}</div>
                 </div>
                 """, 
                 unsafe_allow_html=True
@@ -620,7 +632,7 @@ def visualize_page(data):
                 f"""
                 <div class="metric-card">
                     <div class="metric-label">Data Points</div>
-                    <div class="metric-value" style="color: #6366F1;">{len(data)}</div>
+                    <div class="metric-value" style="color: #6366F1;">{summary['count']}</div>
                 </div>
                 """, 
                 unsafe_allow_html=True
@@ -631,15 +643,19 @@ def visualize_page(data):
         # AQI Distribution
         st.markdown('<div class="section-header">AQI Distribution</div>', unsafe_allow_html=True)
         
-        fig = px.histogram(
-            data, 
+        # Both distributions come from the per-day counts kept in the rollups, not the hourly rows
+        histogram = aqi_histogram(rollups)
+        histogram["AQI"] = histogram["Bin"] + AQI_BIN_WIDTH / 2
+        fig = px.bar(
+            histogram, 
             x="AQI",
-            nbins=30,
+            y="Count",
             title="Distribution of AQI Values",
-            labels={"AQI": "Air Quality Index", "count": "Frequency"},
+            labels={"AQI": "Air Quality Index", "Count": "Frequency"},
             color_discrete_sequence=["#1E3A8A"],
             template="plotly_white"
         )
+        fig.update_traces(width=AQI_BIN_WIDTH)
         
         fig.update_layout(
             height=400,
@@ -654,46 +670,16 @@ def visualize_page(data):
         # AQI Category Distribution
         st.markdown('<div class="section-header">AQI Category Distribution</div>', unsafe_allow_html=True)
         
-        # Function to categorize AQI
-        def categorize_aqi_simple(aqi):
-            if aqi <= 50:
-                return "Good"
-            elif aqi <= 100:
-                return "Moderate"
-            elif aqi <= 150:
-                return "Unhealthy for Sensitive Groups"
-            elif aqi <= 200:
-                return "Unhealthy"
-            elif aqi <= 300:
-                return "Very Unhealthy"
-            else:
-                return "Hazardous"
-        
-        # Add category column
-        data['AQI_Category'] = data['AQI'].apply(categorize_aqi_simple)
-        
-        # Count categories
-        category_counts = data['AQI_Category'].value_counts().reset_index()
-        category_counts.columns = ['Category', 'Count']
-        
-        # Define category colors
-        category_colors = {
-            "Good": "#10B981",
-            "Moderate": "#FBBF24",
-            "Unhealthy for Sensitive Groups": "#F97316",
-            "Unhealthy": "#DC2626",
-            "Very Unhealthy": "#7C3AED",
-            "Hazardous": "#7F1D1D"
-        }
+        counts = aqi_category_counts(rollups)
         
         # Create pie chart
         fig = px.pie(
-            category_counts, 
+            counts, 
             values='Count', 
             names='Category',
             title='Distribution of AQI Categories',
             color='Category',
-            color_discrete_map=category_colors,
+            color_discrete_map=CATEGORY_COLORS,
             hole=0.4,
             template="plotly_white"
         )
@@ -707,38 +693,164 @@ def visualize_page(data):
         st.plotly_chart(fig, use_container_width=True)
     
     with tab3:
-        st.markdown('<div class="section-header">Air Quality Data Table</div>', unsafe_allow_html=True)
-        
-        # Add search functionality
-        search_term = st.text_input("Search data (by date format YYYY-MM-DD):", "")
-        
-        if search_term:
-            filtered_data = data[data["Datetime"].dt.strftime("%Y-%m-%d").str.contains(search_term)]
-        else:
-            filtered_data = data
-        
-        # Add pagination
-        page_size = st.selectbox("Rows per page:", [10, 25, 50, 100])
-        total_pages = len(filtered_data) // page_size + (1 if len(filtered_data) % page_size > 0 else 0)
-        
-        if total_pages > 0:
-            page_number = st.slider("Page:", 1, max(1, total_pages), 1)
-            start_idx = (page_number - 1) * page_size
-            end_idx = min(start_idx + page_size, len(filtered_data))
-            
-            # Display page info
-            st.markdown(f"Showing {start_idx + 1} to {end_idx} of {len(filtered_data)} entries")
-            
-            # Display the data
-            st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
-            st.dataframe(filtered_data.iloc[start_idx:end_idx], use_container_width=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-        else:
-            st.info("No data matches your search criteria.")
+        data_table_section(data)
+
+# Sections with their own widgets run as fragments: a widget change reruns only
+# its section, not the page, the sidebar or the CSS injection in main()
+@st.fragment
+def time_series_section(data, rollups):
+    import plotly.express as px
+    
+    st.markdown('<div class="section-header">Historical AQI Trends</div>', unsafe_allow_html=True)
+    
+    # Date range selector
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input(
+            "Start Date",
+            value=data["Datetime"].min().date(),
+            min_value=data["Datetime"].min().date(),
+            max_value=data["Datetime"].max().date()
+        )
+    with col2:
+        end_date = st.date_input(
+            "End Date",
+            value=data["Datetime"].max().date(),
+            min_value=data["Datetime"].min().date(),
+            max_value=data["Datetime"].max().date()
+        )
+    
+    # Filter data based on date range
+    filtered_data = date_range(data, start_date, end_date)
+    
+    # Keep the chart payload bounded: narrowing the date range brings back finer detail
+    chart_data = filtered_data.iloc[minmax_indices(filtered_data["AQI"].to_numpy())]
+    
+    # Create interactive time series plot with Plotly
+    fig = px.line(
+        chart_data, 
+        x="Datetime", 
+        y="AQI",
+        title="Air Quality Index Over Time",
+        labels={"AQI": "Air Quality Index", "Datetime": "Date"},
+        # Straight segments: a spline through the kept minima and maxima overshoots them
+        line_shape="linear",
+        template="plotly_white"
+    )
+    
+    fig.update_layout(
+        height=500,
+        hovermode="x unified",
+        xaxis_title="Date",
+        yaxis_title="AQI Value",
+        legend_title="Legend",
+        font=dict(family="Arial", size=12),
+        margin=dict(l=40, r=40, t=40, b=40),
+    )
+    
+    # Add AQI threshold lines
+    thresholds = [
+        {"value": 50, "name": "Good", "color": "green"},
+        {"value": 100, "name": "Moderate", "color": "yellow"},
+        {"value": 150, "name": "Unhealthy for Sensitive Groups", "color": "orange"},
+        {"value": 200, "name": "Unhealthy", "color": "red"},
+        {"value": 300, "name": "Very Unhealthy", "color": "purple"}
+    ]
+    
+    for threshold in thresholds:
+        fig.add_shape(
+            type="line",
+            x0=filtered_data["Datetime"].min(),
+            y0=threshold["value"],
+            x1=filtered_data["Datetime"].max(),
+            y1=threshold["value"],
+            line=dict(color=threshold["color"], width=1, dash="dash"),
+        )
+    
+        fig.add_annotation(
+            x=filtered_data["Datetime"].max(),
+            y=threshold["value"],
+            text=threshold["name"],
+            showarrow=False,
+            xshift=10,
+            font=dict(size=10, color=threshold["color"])
+        )
+    
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Monthly average AQI
+    if len(filtered_data) > 30:  # Only show if we have enough data
+        st.markdown('<div class="section-header">Monthly Average AQI</div>', unsafe_allow_html=True)
+    
+        # Monthly averages come from the precomputed daily rollups, in date order
+        monthly_avg = monthly_means(rollups, 'AQI', start_date, end_date)
+    
+        fig = px.bar(
+            monthly_avg, 
+            x='Month', 
+            y='AQI',
+            title='Monthly Average AQI',
+            labels={'AQI': 'Average AQI', 'Month': 'Month'},
+            color='AQI',
+            color_continuous_scale=px.colors.sequential.Viridis,
+            template="plotly_white"
+        )
+    
+        fig.update_layout(
+            height=400,
+            xaxis_title="Month",
+            yaxis_title="Average AQI",
+            font=dict(family="Arial", size=12),
+            margin=dict(l=40, r=40, t=40, b=40),
+        )
+    
+        st.plotly_chart(fig, use_container_width=True)
 
-def predict_page(model):
+@st.fragment
+def data_table_section(data):
+    st.markdown('<div class="section-header">Air Quality Data Table</div>', unsafe_allow_html=True)
+    
+    # Add search functionality
+    search_term = st.text_input("Search data (by date format YYYY-MM-DD):", "")
+    
+    if search_term:
+        dates = load_date_strings(data.attrs["version"], data)
+        positions = np.flatnonzero(dates.str.contains(search_term, regex=False).to_numpy())
+    else:
+        positions = np.arange(len(data))
+    
+    # Add pagination
+    page_size = st.selectbox("Rows per page:", [10, 25, 50, 100])
+    total_pages = len(positions) // page_size + (1 if len(positions) % page_size > 0 else 0)
+    
+    if total_pages > 0:
+        page_number = st.slider("Page:", 1, max(1, total_pages), 1)
+        start_idx = (page_number - 1) * page_size
+        page, total = fetch_page(data, positions, start_idx, page_size)
+    
+        # Display page info
+        st.markdown(f"Showing {start_idx + 1} to {start_idx + len(page)} of {total} entries")
+    
+        # Display the data
+        st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
+        st.dataframe(page, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        st.info("No data matches your search criteria.")
+
+def predict_page(model, predictor, data):
     st.markdown('<h1 class="dashboard-title">Air Quality Prediction</h1>', unsafe_allow_html=True)
     
+    mode = st.radio("Prediction Mode", ["Single Reading", "Batch"], horizontal=True)
+    if mode == "Batch":
+        batch_predict_section(model, data)
+    else:
+        single_predict_section(predictor)
+
+@st.fragment
+def single_predict_section(predictor):
+    import plotly.graph_objects as go
+    
     # Create two columns layout
     col1, col2 = st.columns([3, 2])
     
@@ -802,21 +914,6 @@ def predict_page(model):
     with col2:
         st.markdown('<div class="section-header">Prediction Results</div>', unsafe_allow_html=True)
         
-        # Function to categorize AQI
-        def categorize_aqi(aqi):
-            if aqi <= 50:
-                return "Good", "green", "Enjoy your day outside!", "😊"
-            elif aqi <= 100:
-                return "Moderate", "yellow", "Reduce outdoor exercises!", "😐"
-            elif aqi <= 150:
-                return "Unhealthy for Sensitive Groups", "orange", "Wear a mask outdoors. Close windows to avoid dirty air.", "😷"
-            elif aqi <= 200:
-                return "Unhealthy", "red", "Everyone may experience health effects. Avoid outdoor activities.", "🚫"
-            elif aqi <= 300:
-                return "Very Unhealthy", "purple", "Serious health risks. Stay indoors and use an air purifier if possible.", "⚠️"
-            else:
-                return "Hazardous", "maroon", "Health warning. Avoid going outside, wear a high-quality mask.", "☣️"
-        
         # Display prediction or placeholder
         if predict_clicked:
             try:
@@ -824,18 +921,18 @@ def predict_page(model):
                 input_data = np.array([[pm25, pm10, co, no2, so2, o3, temp, humidity, wind_speed]])
                 
                 # Make prediction
-                predicted_aqi = model.predict(input_data)[0]
+                predicted_aqi = predictor.predict(input_data)[0]
                 
                 # Get AQI category
-                category, color, advice, emoji = categorize_aqi(predicted_aqi)
+                category, color, advice, emoji = category_info(predicted_aqi)
                 
                 # Display prediction with nice styling
                 st.markdown(
                     f"""
                     <div style="background-color: white; padding: 20px; border-radius: 10px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1); text-align: center;">
                         <div style="font-size: 18px; color: #6B7280; margin-bottom: 10px;">Predicted AQI</div>
-                        <div style="font-size: 48px; font-weight: 700; color: #{color if color != 'yellow' else 'CC9900'}; margin-bottom: 15px;">{predicted_aqi:.1f}</div>
-                        <div style="background-color: #{color if color != 'yellow' else 'CC9900'}; color: white; padding: 8px 15px; border-radius: 20px; display: inline-block; font-weight: 600; margin-bottom: 20px;">
+                        <div style="font-size: 48px; font-weight: 700; color: {color}; margin-bottom: 15px;">{predicted_aqi:.1f}</div>
+                        <div style="background-color: {color}; color: white; padding: 8px 15px; border-radius: 20px; display: inline-block; font-weight: 600; margin-bottom: 20px;">
                             {category} {emoji}
                         </div>
                         <div style="font-size: 16px; line-height: 1.5; color: #4B5563; background-color: #f8fafc; padding: 15px; border-radius: 8px; text-align: left;">
@@ -897,13 +994,90 @@ def predict_page(model):
                 unsafe_allow_html=True
             )
 
-def forecast_page(data):
+@st.fragment
+def batch_predict_section(model, data):
+    from models.batch import feature_schema, predict_batch, read_readings
+    
+    st.markdown('<div class="section-header">Batch Prediction</div>', unsafe_allow_html=True)
+    st.markdown(
+        f"""
+        <div style="background-color: #f8fafc; padding: 15px; border-radius: 10px; margin-bottom: 20px; border-left: 4px solid #1E3A8A;">
+            Score many readings at once, either from an uploaded file or from the stored history.
+            Files must contain the model's feature columns: {", ".join(feature_schema(model))}.
+        </div>
+        """, 
+        unsafe_allow_html=True
+    )
+    
+    source = st.radio("Readings", ["Upload File", "Date Range"], horizontal=True)
+    
+    readings = None
+    if source == "Upload File":
+        uploaded = st.file_uploader("Upload readings", type=["csv", "xlsx", "parquet"])
+        if uploaded is not None:
+            readings = read_readings(uploaded)
+    elif not data.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("Start Date", value=data["Datetime"].max().date(), key="batch_start")
+        with col2:
+            end_date = st.date_input("End Date", value=data["Datetime"].max().date(), key="batch_end")
+        readings = date_range(data, start_date, end_date)
+    
+    if readings is None or readings.empty:
+        st.info("Upload a file or pick a date range with readings to score.")
+        return
+    
+    st.markdown(f"{len(readings)} readings selected")
+    
+    if st.button("Run Batch Prediction", type="primary", use_container_width=True):
+        try:
+            # Results arrive chunk by chunk so progress can be shown as they are scored
+            progress = st.progress(0.0, text="Scoring readings...")
+            chunks = []
+            scored = 0
+            for chunk in predict_batch(model, readings):
+                chunks.append(chunk)
+                scored += len(chunk)
+                progress.progress(scored / len(readings), text=f"Scored {scored} of {len(readings)} readings")
+            st.session_state.batch_results = pd.concat(chunks, ignore_index=True)
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+            return
+    
+    results = st.session_state.get("batch_results")
+    if results is not None:
+        st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
+        st.dataframe(results.head(100), use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        if len(results) > 100:
+            st.info(f"Showing first 100 of {len(results)} predictions. Download the full results using the button below.")
+        
+        st.download_button(
+            "Download Predictions",
+            data=partial(export_file, results, None, "CSV"),
+            file_name="aqi_predictions.csv",
+            mime="text/csv",
+            on_click="ignore"
+        )
+
+def forecast_page(data, scheduler):
     st.markdown('<h1 class="dashboard-title">Air Quality Forecasting</h1>', unsafe_allow_html=True)
     
     if data.empty:
         st.warning("No data available for forecasting. Please upload historical data first.")
         return
     
+    # Idempotent; the first visit starts refitting in the background
+    scheduler.start()
+    forecast_section(data, scheduler)
+
+# Changing the duration or generating a forecast only reruns this section
+@st.fragment
+def forecast_section(data, scheduler):
+    import plotly.graph_objects as go
+    
     # Create a more compact forecast configuration
     st.markdown('<div class="section-header">Forecast Configuration</div>', unsafe_allow_html=True)
     
@@ -929,39 +1103,30 @@ def forecast_page(data):
                 current_time = datetime.now()
                 forecast_time = [current_time + timedelta(hours=i) for i in range(1, forecast_hours + 1)]
                 
-                # Get forecasted AQI data
-                # Use st.cache to avoid retraining the model if possible
-                @st.cache_data(ttl=3600)  # Cache for 1 hour
-                def get_forecast(data, hours):
-                    pmodel = train_prophet_model(data)
-                    return forecast_aqi(pmodel, hours)
+                # The scheduler keeps a full-horizon forecast ready; only wait if none exists yet
+                forecast = scheduler.latest(timeout=30)
+                if forecast is None:
+                    if scheduler.error is not None:
+                        st.error(f"⚠️ The forecast could not be prepared: {scheduler.error}")
+                    else:
+                        st.error("The forecast is still being prepared. Please try again in a moment.")
+                    return
+                if scheduler.error is not None:
+                    st.caption(f"Refreshing the forecast failed ({scheduler.error}); showing the last one that succeeded.")
+                if forecast.version != data.attrs["version"]:
+                    st.caption("New data has arrived since this forecast was made; an updated forecast is being prepared.")
                 
-                forecast_df = get_forecast(data, forecast_hours)
+                forecast_df = forecast.frame.head(forecast_hours).copy()
                 forecast_df["Datetime"] = forecast_time
                 
-                # Function to categorize AQI - simplified
-                def categorize_aqi_simple(aqi):
-                    if aqi <= 50:
-                        return "Good", "green"
-                    elif aqi <= 100:
-                        return "Moderate", "#CC9900"
-                    elif aqi <= 150:
-                        return "Unhealthy for Sensitive Groups", "orange"
-                    elif aqi <= 200:
-                        return "Unhealthy", "red"
-                    elif aqi <= 300:
-                        return "Very Unhealthy", "purple"
-                    else:
-                        return "Hazardous", "maroon"
-                
                 # Calculate statistics once
                 avg_aqi = forecast_df["Forecasted AQI"].mean()
                 max_aqi = forecast_df["Forecasted AQI"].max()
                 min_aqi = forecast_df["Forecasted AQI"].min()
                 
-                avg_category, avg_color = categorize_aqi_simple(avg_aqi)
-                max_category, max_color = categorize_aqi_simple(max_aqi)
-                min_category, min_color = categorize_aqi_simple(min_aqi)
+                avg_category, avg_color = category_info(avg_aqi)[:2]
+                max_category, max_color = category_info(max_aqi)[:2]
+                min_category, min_color = category_info(min_aqi)[:2]
                 
                 # Display forecast results in a more compact format
                 tab1, tab2 = st.tabs(["📈 Forecast Chart", "📊 Data Table"])
@@ -1062,7 +1227,7 @@ def forecast_page(data):
                     display_df["Upper Bound"] = display_df["Upper Bound"].round(1)
                     
                     # Add AQI category
-                    display_df["AQI Category"] = display_df["Forecasted AQI"].apply(lambda x: categorize_aqi_simple(x)[0])
+                    display_df["AQI Category"] = categorize(display_df["Forecasted AQI"].to_numpy())
                     
                     # Reorder columns
                     display_df = display_df[["Datetime", "Forecasted AQI", "Lower Bound", "Upper Bound", "AQI Category"]]
@@ -1079,10 +1244,13 @@ def forecast_page(data):
                         st.info(f"Showing first 50 of {len(display_df)} records. Download the full dataset using the button below.")
                     
                     # Add download button
-                    csv = display_df.to_csv(index=False)
-                    b64 = base64.b64encode(csv.encode()).decode()
-                    href = f'<a href="data:file/csv;base64,{b64}" download="aqi_forecast.csv" class="custom-button" style="display: inline-block; margin-top: 10px; text-decoration: none; padding: 10px 15px; background-color: #1E3A8A; color: white; border-radius: 5px;">Download Forecast Data</a>'
-                    st.markdown(href, unsafe_allow_html=True)
+                    st.download_button(
+                        "Download Forecast Data",
+                        data=partial(export_file, display_df, None, "CSV"),
+                        file_name="aqi_forecast.csv",
+                        mime="text/csv",
+                        on_click="ignore"
+                    )
             
             except Exception as e:
                 st.error(f"Error generating forecast: {str(e)}")
@@ -1101,80 +1269,97 @@ def forecast_page(data):
             """,
             unsafe_allow_html=True
         )
-def database_page(data):
-    st.markdown('<h1 class="dashboard-title">Database Management</h1>', unsafe_allow_html=True)
+
+# Filters, sorting and paging only rerun the table; adding or updating records
+# reruns the whole app so every page sees the new data
+@st.fragment
+def database_view_section(data):
+    st.markdown('<div class="section-header">Air Quality Database</div>', unsafe_allow_html=True)
     
-    # Create tabs for different database operations
-    tab1, tab2, tab3 = st.tabs(["📋 View Data", "➕ Add Data", "🔄 Update Data"])
+    # Add filters
+    col1, col2, col3 = st.columns(3)
     
-    with tab1:
-        st.markdown('<div class="section-header">Air Quality Database</div>', unsafe_allow_html=True)
-        
-        # Add filters
-        col1, col2, col3 = st.columns(3)
-        
+    with col1:
+        if not data.empty:
+            min_date = data["Datetime"].min().date()
+            max_date = data["Datetime"].max().date()
+            date_filter = st.date_input(
+                "Filter by Date",
+                value=(min_date, max_date),
+                min_value=min_date,
+                max_value=max_date
+            )
+    
+    with col2:
+        if not data.empty:
+            min_aqi = float(data["AQI"].min())
+            max_aqi = float(data["AQI"].max())
+            aqi_range = st.slider(
+                "AQI Range",
+                min_value=min_aqi,
+                max_value=max_aqi,
+                value=(min_aqi, max_aqi)
+            )
+    
+    with col3:
+        search = st.text_input("Search", placeholder="Text, or e.g. aqi>150 pm10:20..40")
+    
+    # Apply filters as row positions; rows are only read for the page on screen
+    positions = np.arange(0)
+    if not data.empty:
+        start_date, end_date = date_filter if len(date_filter) == 2 else (None, None)
+        hits = load_search_index(data).search(search) if search else None
+        positions = filter_positions(data, start_date, end_date, {"AQI": aqi_range}, hits)
+    
+    # Display data
+    if len(positions) > 0:
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            if not data.empty:
-                min_date = data["Datetime"].min().date()
-                max_date = data["Datetime"].max().date()
-                date_filter = st.date_input(
-                    "Filter by Date",
-                    value=(min_date, max_date),
-                    min_value=min_date,
-                    max_value=max_date
-                )
-        
+            sort_by = st.selectbox("Sort by", list(data.columns), key="db_sort_by")
         with col2:
-            if not data.empty:
-                min_aqi = float(data["AQI"].min())
-                max_aqi = float(data["AQI"].max())
-                aqi_range = st.slider(
-                    "AQI Range",
-                    min_value=min_aqi,
-                    max_value=max_aqi,
-                    value=(min_aqi, max_aqi)
-                )
-        
+            order = st.selectbox("Order", ["Ascending", "Descending"], key="db_order")
         with col3:
-            search = st.text_input("Search", placeholder="Enter keywords...")
+            page_size = st.selectbox("Rows per page:", [25, 50, 100, 500], key="db_page_size")
+        with col4:
+            total_pages = (len(positions) - 1) // page_size + 1
+            page_number = st.number_input("Page", min_value=1, max_value=total_pages, value=1, key="db_page")
         
-        # Apply filters
-        filtered_data = data.copy()
-        if not data.empty:
-            if len(date_filter) == 2:
-                start_date, end_date = date_filter
-                filtered_data = filtered_data[(filtered_data["Datetime"].dt.date >= start_date) & 
-                                             (filtered_data["Datetime"].dt.date <= end_date)]
-            
-            filtered_data = filtered_data[(filtered_data["AQI"] >= aqi_range[0]) & 
-                                         (filtered_data["AQI"] <= aqi_range[1])]
-            
-            if search:
-                filtered_data = filtered_data[filtered_data.astype(str).apply(lambda x: x.str.contains(search, case=False)).any(axis=1)]
+        offset = (page_number - 1) * page_size
+        page, total = fetch_page(data, positions, offset, page_size, sort_by, order == "Ascending")
         
-        # Display data
-        if not filtered_data.empty:
-            st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
-            st.dataframe(filtered_data, use_container_width=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            st.markdown(f"Showing {len(filtered_data)} of {len(data)} records")
-            
-            # Export options
-            col1, col2 = st.columns(2)
-            with col1:
-                csv = filtered_data.to_csv(index=False)
-                b64 = base64.b64encode(csv.encode()).decode()
-                href = f'<a href="data:file/csv;base64,{b64}" download="air_quality_data.csv" class="custom-button" style="display: inline-block; text-decoration: none; padding: 10px 15px; background-color: #1E3A8A; color: white; border-radius: 5px; width: 100%; text-align: center;">Export to CSV</a>'
-                st.markdown(href, unsafe_allow_html=True)
-            
-            with col2:
-                excel = filtered_data.to_csv(index=False)
-                b64 = base64.b64encode(excel.encode()).decode()
-                href = f'<a href="data:application/vnd.ms-excel;base64,{b64}" download="air_quality_data.xlsx" class="custom-button" style="display: inline-block; text-decoration: none; padding: 10px 15px; background-color: #1E3A8A; color: white; border-radius: 5px; width: 100%; text-align: center;">Export to Excel</a>'
-                st.markdown(href, unsafe_allow_html=True)
-        else:
-            st.info("No data available or no records match your filters.")
+        st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
+        st.dataframe(page, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        st.markdown(f"Showing {offset + 1} to {offset + len(page)} of {total} matching records ({len(data)} in total)")
+        
+        # Export options; files are only generated when a button is clicked
+        for col, (fmt, (extension, mime)) in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS.items()):
+            with col:
+                st.download_button(
+                    f"Export to {fmt}",
+                    data=partial(export_file, data, positions, fmt),
+                    file_name=f"air_quality_data.{extension}",
+                    mime=mime,
+                    on_click="ignore",
+                    use_container_width=True
+                )
+    else:
+        st.info("No data available or no records match your filters.")
+
+def database_page(data, record_store):
+    st.markdown('<h1 class="dashboard-title">Database Management</h1>', unsafe_allow_html=True)
+    
+    # Left by the last write, which reran the app to pick up the new data
+    notice = st.session_state.pop("db_notice", None)
+    if notice:
+        st.success(notice)
+    
+    # Create tabs for different database operations
+    tab1, tab2, tab3 = st.tabs(["📋 View Data", "➕ Add Data", "🔄 Update Data"])
+    
+    with tab1:
+        database_view_section(data)
     
     with tab2:
         st.markdown('<div class="section-header">Add New Data</div>', unsafe_allow_html=True)
@@ -1182,34 +1367,65 @@ def database_page(data):
         st.markdown(
             """
             <div style="background-color: #f8fafc; padding: 15px; border-radius: 10px; margin-bottom: 20px; border-left: 4px solid #1E3A8A;">
-                Add new air quality measurements to the database. All fields are required.
+                Add new air quality measurements to the database. AQI is required; leave a field
+                empty if it was not measured. To correct an existing record, use the Update tab.
             </div>
             """, 
             unsafe_allow_html=True
         )
         
+        # Inputs start empty, so a field the user didn't fill is stored as missing rather than 0
         col1, col2 = st.columns(2)
         
         with col1:
             new_date = st.date_input("Date", value=datetime.now().date())
             new_time = st.time_input("Time", value=datetime.now().time())
-            new_aqi = st.number_input("AQI", min_value=0.0, format="%.2f")
-            new_pm25 = st.number_input("PM2.5 (μg/m³)", min_value=0.0, format="%.2f")
-            new_pm10 = st.number_input("PM10 (μg/m³)", min_value=0.0, format="%.2f")
+            new_aqi = st.number_input("AQI", value=None, min_value=0.0, format="%.2f")
+            new_pm25 = st.number_input("PM2.5 (μg/m³)", value=None, min_value=0.0, format="%.2f")
+            new_pm10 = st.number_input("PM10 (μg/m³)", value=None, min_value=0.0, format="%.2f")
         
         with col2:
-            new_co = st.number_input("CO (μg/m³)", key="new_co", min_value=0.0, format="%.2f")
-            new_no2 = st.number_input("NO2 (μg/m³)", key="new_no2", min_value=0.0, format="%.2f")
-            new_so2 = st.number_input("SO2 (μg/m³)", key="new_so2", min_value=0.0, format="%.2f")
-            new_o3 = st.number_input("O3 (μg/m³)", key="new_o3", min_value=0.0, format="%.2f")
-            new_temp = st.number_input("Temperature (°C)", key="new_temp", format="%.2f")
+            new_co = st.number_input("CO (μg/m³)", key="new_co", value=None, min_value=0.0, format="%.2f")
+            new_no2 = st.number_input("NO2 (μg/m³)", key="new_no2", value=None, min_value=0.0, format="%.2f")
+            new_so2 = st.number_input("SO2 (μg/m³)", key="new_so2", value=None, min_value=0.0, format="%.2f")
+            new_temp = st.number_input("Temperature (°C)", key="new_temp", value=None, format="%.2f")
+            new_humidity = st.number_input("Humidity (%)", key="new_humidity", value=None, min_value=0.0, max_value=100.0, format="%.2f")
+            new_wind_speed = st.number_input("Wind Speed (km/h)", key="new_wind_speed", value=None, min_value=0.0, format="%.2f")
         
         # Submit button
         if st.button("Add Record", type="primary", use_container_width=True):
-            st.success("Record added successfully! (This is a simulation - no actual database update)")
+            timestamp = np.datetime64(datetime.combine(new_date, new_time).replace(second=0, microsecond=0), "ns")
+            times = data["Datetime"].to_numpy()
+            position = np.searchsorted(times, timestamp)
+            values = {
+                "PM10 (μg/m³)": new_pm10,
+                "PM2.5 (μg/m³)": new_pm25,
+                "CO (μg/m³)": new_co,
+                "NO2 (μg/m³)": new_no2,
+                "SO2 (μg/m³)": new_so2,
+                "Temp (°C)": new_temp,
+                "Humidity (%)": new_humidity,
+                "Wind_Speed (km/h)": new_wind_speed,
+                "AQI": new_aqi,
+            }
             
-            # In a real application, you would add the record to the database here
-            st.info("In a production environment, this would add the record to your database.")
+            if new_aqi is None:
+                st.error("Enter the AQI of the new record.")
+            elif position < len(times) and times[position] == timestamp:
+                # Adding must not overwrite an existing measurement
+                st.error(f"A record for {pd.Timestamp(timestamp):%Y-%m-%d %H:%M} already exists. Use the Update tab to change it.")
+            else:
+                # Only the fields that were filled in are written
+                new_record = pd.DataFrame([{"Datetime": timestamp, **{k: v for k, v in values.items() if v is not None}}])
+                try:
+                    record_store.upsert(new_record)
+                except Exception as e:
+                    st.error(f"Failed to add record: {e}")
+                else:
+                    # This run loaded the data before the write; rerun so every page,
+                    # cache and the forecast scheduler see the new dataset version
+                    st.session_state.db_notice = "Record added successfully!"
+                    st.rerun()
     
     with tab3:
         st.markdown('<div class="section-header">Update Existing Data</div>', unsafe_allow_html=True)
@@ -1235,22 +1451,33 @@ def database_page(data):
             
             col1, col2 = st.columns(2)
             
+            # Key the inputs on the record so they reset to its values when the selection changes
             with col1:
-                update_aqi = st.number_input("AQI", value=float(record["AQI"]), format="%.2f")
-                update_pm25 = st.number_input("PM2.5 (μg/m³)", key="update_pm25", value=20.3, format="%.2f")
-                update_pm10 = st.number_input("PM10 (μg/m³)", key="update_pm10", value=30.4, format="%.2f")
+                update_aqi = st.number_input("AQI", key=f"update_aqi_{selected_record}", value=float(record["AQI"]), format="%.2f")
+                update_pm25 = st.number_input("PM2.5 (μg/m³)", key=f"update_pm25_{selected_record}", value=float(record["PM2.5 (μg/m³)"]), format="%.2f")
+                update_pm10 = st.number_input("PM10 (μg/m³)", key=f"update_pm10_{selected_record}", value=float(record["PM10 (μg/m³)"]), format="%.2f")
             
             with col2:
-                update_co = st.number_input("CO (μg/m³)", key="update_co", value=0.5, format="%.2f")
-                update_no2 = st.number_input("NO2 (μg/m³)", key="update_no2", value=10.3, format="%.2f")
-                update_o3 = st.number_input("O3 (μg/m³)", key="update_o3", value=30.0, format="%.2f")
+                update_co = st.number_input("CO (μg/m³)", key=f"update_co_{selected_record}", value=float(record["CO (μg/m³)"]), format="%.2f")
+                update_no2 = st.number_input("NO2 (μg/m³)", key=f"update_no2_{selected_record}", value=float(record["NO2 (μg/m³)"]), format="%.2f")
+                update_so2 = st.number_input("SO2 (μg/m³)", key=f"update_so2_{selected_record}", value=float(record["SO2 (μg/m³)"]), format="%.2f")
             
             # Update button
             if st.button("Update Record", type="primary", use_container_width=True):
-                st.success("Record updated successfully! (This is a simulation - no actual database update)")
-                
-                # In a real application, you would update the record in the database here
-                st.info("In a production environment, this would update the record in your database.")
+                updated_record = record.to_frame().T
+                updated_record["AQI"] = update_aqi
+                updated_record["PM2.5 (μg/m³)"] = update_pm25
+                updated_record["PM10 (μg/m³)"] = update_pm10
+                updated_record["CO (μg/m³)"] = update_co
+                updated_record["NO2 (μg/m³)"] = update_no2
+                updated_record["SO2 (μg/m³)"] = update_so2
+                try:
+                    record_store.upsert(updated_record)
+                except Exception as e:
+                    st.error(f"Failed to update record: {e}")
+                else:
+                    st.session_state.db_notice = "Record updated successfully!"
+                    st.rerun()
         else:
             st.info("No data available to update.")
 
@@ -1268,38 +1495,43 @@ def main():
             return  # Stop further code execution and stay on the welcome page
     
     else:
-        # Load model & data
-        try:
-            with open("model.pkl", "rb") as f:
-                model = pickle.load(f)
-        except FileNotFoundError:
-            st.error("Model file not found. Please make sure 'model.pkl' is in the current directory.")
-            model = None
+        # Create sidebar and get selected option
+        selection = create_sidebar()
         
-        @st.cache_data
-        def load_data():
-            try:
-                return pd.read_csv("Air_Quality_dataset_of_kathmandu_modified.csv", parse_dates=["Datetime"])
-            except FileNotFoundError:
-                return pd.DataFrame(columns=["Datetime", "AQI"])
+        # Cheap version checks: file metadata and two small SQLite reads, never the rows
+        record_store = get_record_store()
+        signature = store_signature()
+        versions = record_store.partition_versions()
+        data_version = dataset_version(record_store)
         
-        data = load_data()
+        # Once the refresh thread runs, refit straight away when new records land
+        # instead of at the next tick (a no-op before the Forecast page starts it)
+        scheduler = get_forecast_scheduler()
+        scheduler.notify(data_version)
         
-        # Create sidebar and get selected option
-        selection = create_sidebar()
+        # The forecast page only needs the AQI series, so skip the other columns
+        data = load_data(["AQI"] if selection == "Forecast" else None, signature, versions, data_version)
         
         # Display the selected page
         if selection == "Visualize":
-            visualize_page(data)
+            visualize_page(data, load_rollups(data, signature, versions))
         elif selection == "Predict":
-            if model is not None:
-                predict_page(model)
+            # Deserialised once per process; later calls only stat the file
+            try:
+                model_version = get_model_registry().current("model.pkl")
+            except FileNotFoundError:
+                st.error("Model file not found. Please make sure 'model.pkl' is in the current directory.")
+                model_version = None
+            
+            if model_version is not None:
+                model = model_version.model
+                predict_page(model, load_predictor(model_version.version, model), data)
             else:
                 st.error("Model not available. Please check if the model file exists.")
         elif selection == "Forecast":
-            forecast_page(data)
+            forecast_page(data, scheduler)
         elif selection == "Database":
-            database_page(data)
+            database_page(data, record_store)
         
         # Add footer
         st.markdown(
@@ -0,0 +1,22 @@
+"""Loading the history: the Arrow store and the record overlay behind load_data."""
+from utils.records import apply_records
+from utils.store import TIME_COLUMN, load_frame
+
+
+def bench_load_all_columns(benchmark, store_path):
+    benchmark(load_frame, None, store_path)
+
+
+def bench_load_aqi_column(benchmark, store_path):
+    benchmark(load_frame, ["AQI"], store_path)
+
+
+def bench_apply_records(benchmark, history):
+    # One corrected row in every hundred, plus as many appended rows
+    records = history.iloc[::100].copy()
+    records["AQI"] += 1
+    appended = history.iloc[::100].copy()
+    appended[TIME_COLUMN] += history[TIME_COLUMN].iloc[-1] - history[TIME_COLUMN].iloc[0]
+    records = apply_records(records, appended.iloc[1:])
+
+    benchmark(apply_records, history, records)
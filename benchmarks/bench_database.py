@@ -0,0 +1,34 @@
+"""Filtering, searching and paging on the Database page."""
+from utils.query import fetch_page, filter_positions
+from utils.search import MonthlySearchIndex
+
+
+def bench_date_filter(benchmark, history, month_range):
+    benchmark(filter_positions, history, *month_range)
+
+
+def bench_aqi_filter(benchmark, history):
+    benchmark(filter_positions, history, value_ranges={"AQI": (150, 300)})
+
+
+def bench_build_search_index(benchmark, history):
+    benchmark.pedantic(MonthlySearchIndex, args=(history,), rounds=3)
+
+
+def bench_reindex_one_month(benchmark, history, search_index):
+    # After a write only the touched month's partition token changes
+    month = next(iter(search_index.parts))
+    benchmark(MonthlySearchIndex, history, None, {month: 1}, search_index)
+
+
+def bench_text_search(benchmark, search_index):
+    benchmark(search_index.search, "2023-01-05")
+
+
+def bench_range_search(benchmark, search_index):
+    benchmark(search_index.search, "aqi>150 pm10<50")
+
+
+def bench_sorted_page(benchmark, history):
+    positions = filter_positions(history, value_ranges={"AQI": (100, 500)})
+    benchmark(fetch_page, history, positions, 0, 25, "AQI", False)
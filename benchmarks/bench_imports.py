@@ -0,0 +1,67 @@
+"""Cold-start import cost of the app, in the spirit of ``python -X importtime``.
+
+Each round imports a set of modules in a fresh interpreter: the modules
+``app.py`` imports at startup (at the top level and in ``main()``), and on top
+of those what each page imports when it is first shown. The slowest imports of each set are printed after the
+benchmark table and saved with the run (``extra_info``).
+"""
+import ast
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by main() on every page, through the loaders it calls
+MAIN_MODULES = ["models.scheduler"]
+
+# Imported inside the page functions (and the loaders they call). The Forecast
+# page starts the scheduler thread, whose first fit imports the default backend
+PAGE_MODULES = {
+    "visualize": ["plotly.express"],
+    "predict": ["plotly.graph_objects", "models.batch", "models.compiled_forest", "sklearn.ensemble"],
+    "forecast": ["plotly.graph_objects", "models.prophet_model"],
+}
+
+
+def startup_modules():
+    """Modules imported at the top level of app.py, plus ``MAIN_MODULES``."""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules + MAIN_MODULES
+
+
+def import_times(modules):
+    """``(module, self_us, cumulative_us, depth)`` for every import, from ``-X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+@pytest.mark.parametrize("page", ["startup"] + list(PAGE_MODULES))
+def bench_cold_import(benchmark, import_report, page):
+    modules = startup_modules() + PAGE_MODULES.get(page, [])
+    benchmark.pedantic(import_times, args=(modules,), rounds=3)
+
+    rows = import_times(modules)
+    top = sorted(rows, key=lambda row: row[2], reverse=True)[:10]
+    benchmark.extra_info["import_total_us"] = sum(row[2] for row in rows if row[3] == 0)
+    benchmark.extra_info["slowest_imports"] = [{"module": m, "self_us": s, "cumulative_us": c} for m, s, c, _ in top]
+    import_report[page] = (benchmark.extra_info["import_total_us"], top)
@@ -0,0 +1,82 @@
+"""Model inference and forecasting.
+
+Single-row inference and Prophet only depend on the bundled history; Prophet
+fits take seconds, so they run once per profile.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from models.batch import feature_schema
+from models.compiled_forest import CompiledForest
+from models.numpy_forecaster import RidgeForecaster
+
+
+@pytest.fixture(scope="module")
+def row(forest, bundled_history):
+    return bundled_history[feature_schema(forest)].to_numpy()[:1]
+
+
+def bench_forest_predict_row(benchmark, forest, row):
+    benchmark(forest.predict, row)
+
+
+def bench_compiled_forest_predict_row(benchmark, forest, row):
+    benchmark(CompiledForest.from_sklearn(forest).predict, row)
+
+
+@pytest.mark.parametrize("train_missing", [False, True])
+def bench_compiled_forest_matches_sklearn(benchmark, train_missing):
+    # A small forest, fitted with or without missing values, so both of
+    # scikit-learn's rules for routing NaNs are exercised
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 4), dtype=np.float32)
+    y = 100 * X[:, 0] + 50 * np.sin(6 * X[:, 1]) + rng.normal(0, 5, len(X))
+    if train_missing:
+        X[rng.random(X.shape) < 0.1] = np.nan
+    forest = RandomForestRegressor(n_estimators=25, max_depth=10, random_state=0).fit(X, y)
+
+    # Random rows with NaNs, and NaN-free rows sitting on and right next to every split threshold
+    random_rows = rng.random((500, 4), dtype=np.float32)
+    random_rows[rng.random(random_rows.shape) < 0.1] = np.nan
+    boundary_rows = []
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        # Splits that only separate missing values have an infinite threshold
+        internal = (tree.children_left != -1) & np.isfinite(tree.threshold)
+        for feature, threshold in zip(tree.feature[internal], tree.threshold[internal].astype(np.float32)):
+            rows = rng.random((3, 4), dtype=np.float32)
+            rows[:, feature] = [np.nextafter(threshold, -np.inf), threshold, np.nextafter(threshold, np.inf)]
+            boundary_rows.append(rows)
+    boundary_rows = np.concatenate(boundary_rows)
+    inputs = np.concatenate([random_rows, boundary_rows])
+
+    compiled = CompiledForest.from_sklearn(forest)
+    predicted = benchmark(compiled.predict, inputs)
+    assert np.array_equal(predicted, forest.predict(inputs))
+    # Batches without NaNs and single rows take separate paths through the walk
+    assert np.array_equal(compiled.predict(boundary_rows), forest.predict(boundary_rows))
+    for row in np.concatenate([random_rows[:50], boundary_rows[::30]]):
+        assert np.array_equal(compiled.predict(row[None]), forest.predict(row[None]))
+
+
+def bench_forest_predict_batch(benchmark, forest, history):
+    batch = history[feature_schema(forest)].to_numpy()[:10000]
+    benchmark.pedantic(forest.predict, args=(batch,), rounds=3)
+
+
+@pytest.mark.parametrize("profile", ["full", "fastest"])
+def bench_train_prophet_model(benchmark, bundled_history, profile):
+    prophet_model = pytest.importorskip("models.prophet_model")
+    benchmark.pedantic(prophet_model.train_prophet_model, args=(bundled_history,), kwargs={"profile": profile}, rounds=1)
+
+
+@pytest.mark.parametrize("profile", ["full", "fastest"])
+def bench_forecast_aqi(benchmark, bundled_history, profile):
+    prophet_model = pytest.importorskip("models.prophet_model")
+    model = prophet_model.train_prophet_model(bundled_history, profile=profile)
+    benchmark(prophet_model.forecast_aqi, model, 168)
+
+
+def bench_numpy_forecaster(benchmark, history):
+    benchmark(lambda: RidgeForecaster().fit(history["Datetime"], history["AQI"]).forecast(168))
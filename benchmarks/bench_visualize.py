@@ -0,0 +1,27 @@
+"""Aggregates and chart preparation on the Visualize page."""
+from utils.downsample import minmax_indices
+from utils.rollups import aqi_category_counts, aqi_histogram, build_rollups, monthly_means, range_summary
+
+
+def bench_build_rollups(benchmark, history):
+    benchmark.pedantic(build_rollups, args=(history,), rounds=3)
+
+
+def bench_range_summary(benchmark, rollups, month_range):
+    benchmark(range_summary, rollups, "AQI", *month_range)
+
+
+def bench_monthly_means(benchmark, history, rollups):
+    benchmark(monthly_means, rollups, "AQI", history["Datetime"].iloc[0].date(), history["Datetime"].iloc[-1].date())
+
+
+def bench_downsample(benchmark, history):
+    benchmark(minmax_indices, history["AQI"].to_numpy())
+
+
+def bench_aqi_histogram(benchmark, rollups):
+    benchmark(aqi_histogram, rollups)
+
+
+def bench_category_counts(benchmark, rollups):
+    benchmark(aqi_category_counts, rollups)
@@ -0,0 +1,53 @@
+"""Compare the compiled forest against scikit-learn's predict on model.pkl.
+
+Checks that both give identical predictions on the bundled history, then
+times single-row and small-batch inference.
+
+    python -m benchmarks.compiled_forest [model.pkl]
+"""
+import argparse
+import pickle
+import timeit
+import warnings
+
+import numpy as np
+
+from models.batch import feature_schema
+from models.compiled_forest import CompiledForest
+from utils.store import load_frame
+
+
+def best_time(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", nargs="?", default="model.pkl")
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        forest = pickle.load(f)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    X = load_frame()[feature_schema(forest)].to_numpy()
+    # scikit-learn warns about plain arrays on a model fitted with feature names
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    identical = np.array_equal(forest.predict(X), compiled.predict(X))
+    print(f"Identical predictions on {len(X)} rows: {identical}")
+    if not identical:
+        raise SystemExit(1)
+
+    for rows in (1, 10, 100):
+        batch = X[:rows]
+        sklearn_time = best_time(lambda: forest.predict(batch), 20)
+        compiled_time = best_time(lambda: compiled.predict(batch), 200)
+        print(
+            f"{rows:>4} rows: sklearn {sklearn_time * 1e6:9.1f} µs, "
+            f"compiled {compiled_time * 1e6:9.1f} µs ({sklearn_time / compiled_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Datasets shared by the benchmark suite.
+
+Data fixtures are parametrised over the bundled Kathmandu history and a
+synthetic copy scaled up ``BENCH_SCALE`` times (default 10): copies of the
+history laid end to end in time, each with a little multiplicative noise.
+"""
+import os
+import pickle
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.rollups import build_rollups
+from utils.search import MonthlySearchIndex
+from utils.store import STORE_PATH, TIME_COLUMN, VALUE_COLUMNS, load_frame, write_store
+
+SCALE = int(os.environ.get("BENCH_SCALE", 10))
+MODEL_PATH = "model.pkl"
+
+# Recorded with every saved run, so slowdowns can be traced to an upgrade
+PACKAGES = ["numpy", "pandas", "pyarrow", "scikit-learn", "prophet", "streamlit"]
+
+IMPORT_REPORT = pytest.StashKey[dict]()
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = version(name)
+        except PackageNotFoundError:
+            packages[name] = None
+    machine_info["packages"] = packages
+
+
+@pytest.fixture(scope="session")
+def import_report(pytestconfig):
+    """Slowest imports per page, filled in by bench_imports.py."""
+    return pytestconfig.stash.setdefault(IMPORT_REPORT, {})
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    report = config.stash.get(IMPORT_REPORT, None)
+    if not report:
+        return
+    terminalreporter.section("import time (cumulative, like python -X importtime)")
+    for page, (total_us, top) in report.items():
+        terminalreporter.write_line(f"{page}: {total_us / 1000:.0f} ms")
+        for module, _, cumulative_us, _ in top:
+            terminalreporter.write_line(f"    {cumulative_us / 1000:8.1f} ms  {module}")
+
+
+def scale_up(data, factor, seed=0):
+    """``factor`` noisy copies of ``data`` laid end to end in time."""
+    rng = np.random.default_rng(seed)
+    span = data[TIME_COLUMN].iloc[-1] - data[TIME_COLUMN].iloc[0] + pd.Timedelta(hours=1)
+
+    parts = []
+    for i in range(factor):
+        part = data.copy()
+        part[TIME_COLUMN] = part[TIME_COLUMN] + i * span
+        for column in VALUE_COLUMNS:
+            noise = rng.normal(1.0, 0.05, len(part)).astype(np.float32)
+            part[column] = part[column].to_numpy() * noise
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+@pytest.fixture(scope="session", params=["bundled", f"x{SCALE}"])
+def store_path(request, tmp_path_factory):
+    """Path of an Arrow store holding the bundled or the scaled-up history."""
+    bundled = load_frame()
+    if request.param == "bundled":
+        return STORE_PATH
+
+    path = str(tmp_path_factory.mktemp("store") / "scaled.arrow")
+    write_store(scale_up(bundled, SCALE), path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def history(store_path):
+    return load_frame(store_path=store_path)
+
+
+@pytest.fixture(scope="session")
+def bundled_history():
+    return load_frame()
+
+
+@pytest.fixture(scope="session")
+def search_index(history):
+    return MonthlySearchIndex(history)
+
+
+@pytest.fixture(scope="session")
+def rollups(history):
+    return build_rollups(history)
+
+
+@pytest.fixture(scope="session")
+def forest():
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip(f"{MODEL_PATH} not found")
+    with open(MODEL_PATH, "rb") as f:
+        return pickle.load(f)
+
+
+@pytest.fixture(scope="session")
+def month_range(history):
+    """``(start_date, end_date)`` of a 30-day range in the middle of the history."""
+    start = history[TIME_COLUMN].iloc[len(history) // 2].date()
+    return start, start + pd.Timedelta(days=30)
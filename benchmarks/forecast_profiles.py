@@ -0,0 +1,63 @@
+"""Accuracy/latency trade-off of the Prophet forecast profiles and the NumPy backend.
+
+For each profile (and the ``numpy`` backend), fits the AQI history up to a few rolling cutoffs, forecasts
+the following ``--hours`` hours and compares the forecast with what was
+actually measured: fit and predict time, MAE, RMSE and how often the actual
+value fell inside the 95% interval.
+
+    python -m benchmarks.forecast_profiles [--hours 168] [--cutoffs 3]
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from models.forecasting import get_backend
+from models.prophet_model import PROFILES
+from utils.store import load_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=int, default=168, help="forecast horizon")
+    parser.add_argument("--cutoffs", type=int, default=3, help="number of cutoffs, one horizon apart")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES) + ["numpy"], default=list(PROFILES) + ["numpy"])
+    args = parser.parse_args()
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    data = load_frame(["AQI"])
+    observed = data.set_index("Datetime")["AQI"]
+
+    print(f"{'profile':<8} {'fit s':>7} {'predict s':>9} {'MAE':>7} {'RMSE':>7} {'coverage':>8}")
+    for profile in args.profiles:
+        backend = get_backend("numpy" if profile == "numpy" else "prophet")
+        fit_times, predict_times, errors, covered = [], [], [], []
+        for fold in range(args.cutoffs, 0, -1):
+            cutoff = len(data) - fold * args.hours
+
+            start = time.perf_counter()
+            model = backend.fit(data.iloc[:cutoff], profile=profile)
+            fit_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            forecast = backend.forecast(model, args.hours)
+            predict_times.append(time.perf_counter() - start)
+
+            # Matched by timestamp, so a forecast that starts at the wrong hour shows up as error
+            actual = observed.reindex(forecast["Datetime"]).to_numpy()
+
+            errors.append(forecast["Forecasted AQI"].to_numpy() - actual)
+            inside = (forecast["Lower Bound"].to_numpy() <= actual) & (actual <= forecast["Upper Bound"].to_numpy())
+            covered.append(inside[~np.isnan(actual)])
+
+        errors = np.concatenate(errors)
+        print(
+            f"{profile:<8} {np.mean(fit_times):7.3f} {np.mean(predict_times):9.3f} "
+            f"{np.nanmean(np.abs(errors)):7.2f} {np.sqrt(np.nanmean(errors ** 2)):7.2f} "
+            f"{np.mean(np.concatenate(covered)):8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
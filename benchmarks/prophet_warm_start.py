@@ -0,0 +1,51 @@
+"""Compare a warm-started Prophet refit against a cold fit after new data arrives.
+
+Fits the history without its last ``--new-hours`` hours, then refits the full
+history both from scratch and warm-started from that fit, and reports the fit
+times and how far apart the two 168-hour forecasts are.
+
+    python -m benchmarks.prophet_warm_start [--new-hours 24]
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from models.prophet_model import forecast_aqi, train_prophet_model, warm_start_params
+from utils.store import load_frame
+
+
+def timed_fit(data, init=None):
+    start = time.perf_counter()
+    model = train_prophet_model(data, init)
+    return model, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--new-hours", type=int, default=24, help="hours appended after the previous fit")
+    args = parser.parse_args()
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    data = load_frame(["AQI"])
+    previous, _ = timed_fit(data.iloc[:-args.new_hours])
+
+    cold, cold_time = timed_fit(data)
+    warm, warm_time = timed_fit(data, warm_start_params(previous))
+    print(f"Cold fit {cold_time:6.2f} s, warm-started refit {warm_time:6.2f} s ({warm_time / cold_time:.0%})")
+
+    cold_forecast = forecast_aqi(cold, 168)["Forecasted AQI"].to_numpy()
+    warm_forecast = forecast_aqi(warm, 168)["Forecasted AQI"].to_numpy()
+    difference = np.abs(warm_forecast - cold_forecast)
+    print(
+        f"168 h forecast difference: mean {difference.mean():.3f}, max {difference.max():.3f} AQI "
+        f"(forecast mean {cold_forecast.mean():.1f})"
+    )
+
+    for name in ("k", "m", "sigma_obs"):
+        print(f"{name:>9}: cold {cold.params[name][0][0]:.6f}, warm {warm.params[name][0][0]:.6f}")
+
+
+if __name__ == "__main__":
+    main()
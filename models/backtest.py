@@ -0,0 +1,152 @@
+"""Rolling-origin backtests of the forecasting backends.
+
+Each cutoff splits the history. A model is fitted on everything up to the
+cutoff and forecasts the following hours, and the forecast is compared with
+what was actually measured. Folds are fitted in a process pool. Each fold's
+forecast is cached on disk under a hash of its model, horizon and training
+data. Cutoffs sit on a fixed grid (whole multiples of the step since the
+epoch), so new data only adds folds and a rerun only fits those.
+
+Models are given as ``backend[:profile]``, e.g. ``prophet:fast`` or ``numpy``:
+
+    python -m models.backtest --folds 52 --models prophet:full prophet:fastest numpy
+"""
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.forecasting import BACKENDS, get_backend
+from models.parallel import run_tasks
+from utils.records import RecordStore, load_history
+from utils.files import atomic_write
+from utils.store import TIME_COLUMN
+
+# The horizons offered on the Forecast page
+HORIZONS = [24, 48, 72, 96, 120, 144, 168]
+BACKTEST_CACHE_DIR = os.path.join(".cache", "backtest")
+
+
+def parse_model(spec):
+    """``(backend, profile)`` from a ``backend[:profile]`` string."""
+    backend, _, profile = spec.partition(":")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown forecast backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    return backend, profile or "full"
+
+
+def rolling_cutoffs(data, folds=12, step_hours=168, horizon=max(HORIZONS)):
+    """The last ``folds`` cutoffs that leave ``horizon`` hours to score.
+
+    Cutoffs are whole multiples of ``step_hours`` since the epoch, so they do
+    not move (and their cached folds stay valid) when data is appended.
+    """
+    times = data[TIME_COLUMN]
+    last = (times.iloc[-1] - pd.Timedelta(hours=horizon)).floor(f"{step_hours}h")
+    cutoffs = [last - pd.Timedelta(hours=step_hours * i) for i in range(folds)]
+    return sorted(cutoff for cutoff in cutoffs if cutoff > times.iloc[0])
+
+
+def fold_path(train, model, horizon, cache_dir=BACKTEST_CACHE_DIR):
+    digest = hashlib.sha1(f"{model}:{horizon}:{list(train.columns)}".encode())
+    for column in train.columns:
+        digest.update(train[column].to_numpy().tobytes())
+    backend, profile = parse_model(model)
+    return os.path.join(cache_dir, f"{backend}-{profile}-{digest.hexdigest()[:16]}.parquet")
+
+
+def _run_fold(task):
+    model, train, target, horizon, path = task
+    backend_name, profile = parse_model(model)
+    backend = get_backend(backend_name)
+    forecast = backend.forecast(backend.fit(train, target=target, profile=profile), horizon).reset_index(drop=True)
+
+    with atomic_write(path) as tmp_path:
+        forecast.to_parquet(tmp_path, index=False)
+    return forecast
+
+
+def backtest(data, models=("prophet", "numpy"), cutoffs=None, horizon=max(HORIZONS), target="AQI",
+             cache_dir=BACKTEST_CACHE_DIR, max_workers=None):
+    """Forecast from every cutoff with every model and line the forecasts up with the actuals.
+
+    Returns one row per model, cutoff and forecast hour with the columns
+    Model, Cutoff, Step (hours after the cutoff), Datetime, Forecast,
+    Lower Bound, Upper Bound and Actual.
+    """
+    if cutoffs is None:
+        cutoffs = rolling_cutoffs(data, horizon=horizon)
+    data = data[[TIME_COLUMN, target]]
+    times = data[TIME_COLUMN].to_numpy()
+
+    folds, keys, tasks = {}, [], []
+    for model in models:
+        for cutoff in cutoffs:
+            train = data.iloc[:np.searchsorted(times, np.datetime64(cutoff), side="right")]
+            path = fold_path(train, model, horizon, cache_dir)
+            if os.path.exists(path):
+                folds[model, cutoff] = pd.read_parquet(path)
+            else:
+                keys.append((model, cutoff))
+                tasks.append((model, train, target, horizon, path))
+
+    folds.update(zip(keys, run_tasks(_run_fold, tasks, max_workers)))
+
+    actuals = data.set_index(TIME_COLUMN)[target]
+    frames = []
+    for model in models:
+        for cutoff in cutoffs:
+            fold = folds[model, cutoff].rename(columns={"Forecasted AQI": "Forecast"})
+            fold.insert(0, "Model", model)
+            fold.insert(1, "Cutoff", cutoff)
+            fold.insert(2, "Step", (fold["Datetime"] - cutoff) // pd.Timedelta(hours=1))
+            fold["Actual"] = actuals.reindex(fold["Datetime"]).to_numpy()
+            frames.append(fold)
+    return pd.concat(frames, ignore_index=True)
+
+
+def score(folds, horizons=HORIZONS):
+    """MAE, RMSE and interval coverage per model for forecasts of each length in ``horizons``."""
+    rows = []
+    for model, group in folds.dropna(subset=["Actual"]).groupby("Model", sort=False):
+        for horizon in horizons:
+            scored = group[(group["Step"] >= 1) & (group["Step"] <= horizon)]
+            errors = scored["Forecast"] - scored["Actual"]
+            inside = (scored["Lower Bound"] <= scored["Actual"]) & (scored["Actual"] <= scored["Upper Bound"])
+            rows.append({
+                "Model": model,
+                "Horizon": horizon,
+                "Folds": scored["Cutoff"].nunique(),
+                "MAE": errors.abs().mean(),
+                "RMSE": np.sqrt((errors ** 2).mean()),
+                "Coverage": inside.mean(),
+            })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecasting backends.")
+    parser.add_argument("--models", nargs="+", default=["prophet:full", "numpy"], help="backend[:profile] to compare")
+    parser.add_argument("--folds", type=int, default=12, help="number of cutoffs")
+    parser.add_argument("--step", type=int, default=168, help="hours between cutoffs")
+    parser.add_argument("--target", default="AQI", help="column to forecast")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--csv", help="also write the scores to this CSV file")
+    args = parser.parse_args()
+
+    for model in args.models:
+        parse_model(model)  # fail fast on a typo, before any fitting starts
+
+    data = load_history(RecordStore(), columns=[args.target])
+    cutoffs = rolling_cutoffs(data, args.folds, args.step)
+    scores = score(backtest(data, args.models, cutoffs, target=args.target, max_workers=args.workers))
+
+    print(scores.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    if args.csv:
+        scores.to_csv(args.csv, index=False)
+
+
+if __name__ == "__main__":
+    main()
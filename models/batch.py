@@ -0,0 +1,64 @@
+"""Batch AQI prediction over many sensor readings."""
+import numpy as np
+import pandas as pd
+from joblib import parallel_config
+
+from utils.aqi import categorize
+from utils.store import VALUE_COLUMNS
+
+CHUNK_ROWS = 10000
+
+# Feature columns for models trained without feature names (the notebook's
+# frame minus its AQI target)
+DEFAULT_FEATURES = [c for c in VALUE_COLUMNS if c != "AQI"]
+
+
+def feature_schema(model):
+    """Ordered feature columns the model was trained on."""
+    names = getattr(model, "feature_names_in_", None)
+    return list(names) if names is not None else DEFAULT_FEATURES
+
+
+def validate_features(frame, model):
+    """The model's feature columns from ``frame`` as float32, in training order.
+
+    Raises ``ValueError`` listing any feature columns that are missing.
+    """
+    features = feature_schema(model)
+    missing = [c for c in features if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {', '.join(missing)}")
+    return frame[features].apply(pd.to_numeric, errors="coerce").astype("float32")
+
+
+def predict_batch(model, frame, chunk_rows=CHUNK_ROWS, n_jobs=-1):
+    """Yield ``frame`` chunk by chunk with ``Predicted AQI`` and ``AQI Category`` added.
+
+    Trees are evaluated on ``n_jobs`` threads. Rows with missing features get
+    no prediction.
+    """
+    features = validate_features(frame, model)
+    complete = features.notna().all(axis=1).to_numpy()
+
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows].copy()
+        rows = complete[start:start + chunk_rows]
+
+        predicted = np.full(len(chunk), np.nan)
+        if rows.any():
+            with parallel_config(backend="threading", n_jobs=n_jobs):
+                predicted[rows] = model.predict(features.iloc[start:start + chunk_rows][rows])
+
+        chunk["Predicted AQI"] = predicted
+        chunk["AQI Category"] = np.where(np.isnan(predicted), None, categorize(predicted))
+        yield chunk
+
+
+def read_readings(uploaded_file):
+    """Read an uploaded CSV, Excel or Parquet file of readings into a frame."""
+    name = uploaded_file.name.lower()
+    if name.endswith(".xlsx"):
+        return pd.read_excel(uploaded_file)
+    if name.endswith(".parquet"):
+        return pd.read_parquet(uploaded_file)
+    return pd.read_csv(uploaded_file)
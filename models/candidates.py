@@ -0,0 +1,41 @@
+"""The candidate regressors of the training pipeline (``models.train``) and the tuning search."""
+from sklearn.ensemble import (
+    AdaBoostRegressor,
+    BaggingRegressor,
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    RandomForestRegressor,
+)
+
+SEED = 42
+
+
+def candidate_models():
+    """Factories for the notebook's candidate regressors that are installed here.
+
+    Each factory takes ``n_jobs``; estimators that cannot use several cores ignore it.
+    """
+    candidates = {
+        "RandomForestRegressor": lambda n_jobs: RandomForestRegressor(n_estimators=100, random_state=SEED, n_jobs=n_jobs),
+        "ExtraTreesRegressor": lambda n_jobs: ExtraTreesRegressor(random_state=SEED, n_jobs=n_jobs),
+        "BaggingRegressor": lambda n_jobs: BaggingRegressor(random_state=SEED, n_jobs=n_jobs),
+        "GradientBoostingRegressor": lambda n_jobs: GradientBoostingRegressor(random_state=SEED),
+        "AdaBoostRegressor": lambda n_jobs: AdaBoostRegressor(random_state=SEED),
+    }
+    # The boosting libraries are optional
+    try:
+        from xgboost import XGBRegressor
+        candidates["XGBRegressor"] = lambda n_jobs: XGBRegressor(random_state=SEED, n_jobs=n_jobs)
+    except ImportError:
+        pass
+    try:
+        from lightgbm import LGBMRegressor
+        candidates["LGBMRegressor"] = lambda n_jobs: LGBMRegressor(random_state=SEED, n_jobs=n_jobs, verbose=-1)
+    except ImportError:
+        pass
+    try:
+        from catboost import CatBoostRegressor
+        candidates["CatBoostRegressor"] = lambda n_jobs: CatBoostRegressor(random_seed=SEED, thread_count=n_jobs, verbose=0)
+    except ImportError:
+        pass
+    return candidates
@@ -0,0 +1,119 @@
+"""Flat-array evaluator for trained scikit-learn forest regressors.
+
+The trees of a ``RandomForestRegressor`` (or ``ExtraTreesRegressor``) are
+concatenated into contiguous node arrays, and all trees are walked together
+one level at a time with NumPy indexing. Leaves point at themselves, so the
+walk needs no per-tree bookkeeping. Predictions match ``forest.predict`` bit
+for bit: inputs are cast to float32 like scikit-learn does, and tree outputs
+are summed in estimator order before dividing by the number of trees.
+
+This is meant for single rows and small batches; large batches are still
+faster through the forest's own multi-threaded ``predict``.
+"""
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+
+def can_compile(model):
+    """Whether ``model`` is a single-output forest this module can compile."""
+    return isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)) and model.n_outputs_ == 1
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, nan_left, children, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.nan_left = nan_left
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        if not can_compile(forest):
+            raise TypeError(f"Cannot compile {type(forest).__name__}")
+
+        features, thresholds, nan_lefts, lefts, rights, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count) + offset
+            leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves: threshold +inf always sends them "left"
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            nan_lefts.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool))
+            lefts.append(np.where(leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(leaf, nodes, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            nan_left=np.concatenate(nan_lefts),
+            children=np.ascontiguousarray(np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+        )
+
+    def apply(self, X):
+        """Leaf node reached in every tree, shape ``(n_rows, n_trees)``."""
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        children = self.children.ravel()
+        has_nan = bool(np.isnan(flat_x).any())
+
+        # A single row walks a 1-D node vector; more rows walk a (rows, trees) grid
+        if n_rows == 1:
+            row_offsets = 0
+            nodes = self.roots
+        else:
+            row_offsets = (np.arange(n_rows) * n_features)[:, None]
+            nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+
+        for _ in range(self.max_depth):
+            x = flat_x[row_offsets + self.feature[nodes]]
+            if has_nan:
+                go_right = ~((x <= self.threshold[nodes]) | (np.isnan(x) & self.nan_left[nodes]))
+            else:
+                go_right = x > self.threshold[nodes]
+            next_nodes = children[2 * nodes + go_right]
+            # Internal nodes always move, so no movement means every tree is at a leaf
+            if np.array_equal(next_nodes, nodes):
+                break
+            nodes = next_nodes
+        return nodes.reshape(n_rows, -1)
+
+    def predict(self, X):
+        """Mean tree output per row, identical to ``forest.predict(X)``."""
+        leaf_values = self.value[self.apply(X)]
+        # cumsum adds strictly left to right, like the forest's running total
+        return np.cumsum(leaf_values, axis=1)[:, -1] / len(self.roots)
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            nan_left=self.nan_left,
+            children=self.children,
+            value=self.value,
+            roots=self.roots,
+            max_depth=self.max_depth,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            fields = {name: arrays[name] for name in arrays.files}
+        fields["max_depth"] = int(fields["max_depth"])
+        return cls(**fields)
@@ -0,0 +1,74 @@
+"""Pluggable forecasting backends.
+
+A backend fits a model on a history frame and turns a fitted model into the
+``Datetime / Forecasted AQI / Lower Bound / Upper Bound`` frame that
+``forecast_aqi`` returns. The backend is chosen with the ``FORECAST_BACKEND``
+environment variable:
+
+- ``prophet`` (default): ``models.prophet_model``, imported only when used
+- ``numpy``: ``models.numpy_forecaster``, which fits in a fraction of a second and runs
+  without Prophet installed
+"""
+import os
+
+from utils.store import TIME_COLUMN
+
+FORECAST_BACKEND = os.environ.get("FORECAST_BACKEND", "prophet")
+
+
+class ProphetBackend:
+    name = "prophet"
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+
+    def fit(self, data, version=None, previous=None, target="AQI", profile="full"):
+        """Fitted model; with a dataset ``version`` it goes through the on-disk model cache."""
+        from models.prophet_model import MODEL_CACHE_DIR, cached_prophet_model, train_prophet_model
+
+        if version is None:
+            return train_prophet_model(data, target=target, profile=profile)
+        return cached_prophet_model(
+            data, version, self.cache_dir or MODEL_CACHE_DIR, previous=previous, target=target, profile=profile
+        )
+
+    def load(self, version, target="AQI", profile="full"):
+        """The cached model of an earlier ``version``, or ``None``."""
+        from models.prophet_model import MODEL_CACHE_DIR, load_model, model_path
+
+        try:
+            return load_model(model_path(version, self.cache_dir or MODEL_CACHE_DIR, target, profile))
+        except (OSError, ValueError):
+            return None
+
+    def forecast(self, model, hours):
+        from models.prophet_model import forecast_aqi
+
+        return forecast_aqi(model, hours)
+
+
+class NumpyBackend:
+    name = "numpy"
+
+    def fit(self, data, version=None, previous=None, target="AQI", profile="full"):
+        # A fit takes a fraction of a second, so it is not cached; version and profile are not used
+        from models.numpy_forecaster import RidgeForecaster
+
+        return RidgeForecaster().fit(data[TIME_COLUMN], data[target])
+
+    def load(self, version, target="AQI", profile="full"):
+        return None
+
+    def forecast(self, model, hours):
+        return model.forecast(hours)
+
+
+BACKENDS = {"prophet": ProphetBackend, "numpy": NumpyBackend}
+
+
+def get_backend(name=None):
+    """A backend instance by name, defaulting to ``FORECAST_BACKEND``."""
+    name = name or FORECAST_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown forecast backend {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,36 @@
+"""Process pools for the fitting jobs (forecast panels, backtests, cross-validation, tuning).
+
+Workers are spawned rather than forked: a forked child would inherit the
+threads of the process that starts it (e.g. Streamlit's) without them
+running. Each task should use a single core, since the pool already spreads
+the work over every core.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def available_cores():
+    # Honour CPU affinity (containers, taskset) where the platform reports it
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def process_pool(max_workers=None):
+    """A pool of ``max_workers`` spawned processes (default: one per available core)."""
+    return ProcessPoolExecutor(max_workers or available_cores(), mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_tasks(func, tasks, max_workers=None):
+    """``[func(task) for task in tasks]``, spread over a process pool when several cores are available.
+
+    ``func`` and the tasks must be picklable. With a single worker the tasks
+    run in this process, which avoids starting a pool.
+    """
+    tasks = list(tasks)
+    max_workers = min(len(tasks), max_workers or available_cores())
+    if max_workers <= 1:
+        return [func(task) for task in tasks]
+    with process_pool(max_workers) as pool:
+        return list(pool.map(func, tasks))
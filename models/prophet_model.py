@@ -1,22 +1,189 @@
+import hashlib
+import json
+import os
+import re
+from statistics import NormalDist
+
 import pandas as pd
 from prophet import Prophet
-import matplotlib.pyplot as plt
-def train_prophet_model(data):
+from prophet.serialize import model_from_dict, model_to_dict
+
+from models.parallel import run_tasks
+from utils.files import atomic_write
+from utils.store import TIME_COLUMN, VALUE_COLUMNS
+
+# Fitted models are kept here as Prophet JSON, one file per dataset version
+MODEL_CACHE_DIR = os.path.join(".cache", "prophet")
+# Files kept per target and profile; older versions are deleted when a new one is saved
+KEEP_MODELS = 3
+
+# Every pollutant and weather series can be forecast on its own
+FORECAST_TARGETS = VALUE_COLUMNS
+
+# Fit/predict settings selectable per call; "full" is the original behaviour and
+# the others trade some accuracy for latency (see benchmarks/forecast_profiles.py).
+#   uncertainty_samples: 0 replaces simulated intervals with analytic ones
+#   window_days: fit on a trailing window of the history only
+#   resample: pre-aggregate the hourly history (stay under 12h, or the daily cycle is lost)
+# All profiles are MAP fits; none of them runs MCMC.
+PROFILES = {
+    "full": {"uncertainty_samples": 1000, "window_days": None, "resample": None},
+    "fast": {"uncertainty_samples": 0, "window_days": None, "resample": "3h"},
+    "fastest": {"uncertainty_samples": 0, "window_days": 180, "resample": "3h"},
+}
+
+def prepare_history(df, window_days=None, resample=None):
+    """Trim ``df`` (``ds``/``y`` columns) to a trailing window and/or aggregate it."""
+    if window_days:
+        df = df[df["ds"] > df["ds"].max() - pd.Timedelta(days=window_days)]
+    if resample:
+        # Label each bin with the mean time of its readings (its centre), not its start,
+        # so the fitted daily cycle keeps its phase
+        bins = df.dropna(subset=["y"]).groupby(pd.Grouper(key="ds", freq=resample))
+        df = bins.agg(ds=("ds", "mean"), y=("y", "mean")).dropna().reset_index(drop=True)
+    return df
+
+def train_prophet_model(data, init=None, target="AQI", profile="full"):
+    settings = PROFILES[profile]
     df =data
-    df = df.rename(columns={"Datetime": "ds", "AQI": "y"})  
+    df = df.rename(columns={"Datetime": "ds", target: "y"})[["ds", "y"]]  
+    # Forecasts start after the last hourly reading, wherever resampling puts the last bin
+    history_end = df.loc[df["y"].notna(), "ds"].max()
+    df = prepare_history(df, settings["window_days"], settings["resample"])
     
-    model = Prophet(interval_width=0.95)  # 95% confidence interval
-    model.fit(df)
+    model = Prophet(
+        interval_width=0.95,  # 95% confidence interval
+        uncertainty_samples=settings["uncertainty_samples"],
+        mcmc_samples=0,  # MAP estimate only
+    )
+    if init is None:
+        model.fit(df)
+    else:
+        # Warm start: the optimizer begins at a previous fit (see warm_start_params)
+        model.fit(df, init=init)
+    model.history_end = history_end
     
     return model
 
+def warm_start_params(model):
+    """Fitted parameters of ``model`` (k, m, delta, beta, sigma_obs) as initial values for a refit."""
+    params = {name: model.params[name][0][0] for name in ("k", "m", "sigma_obs")}
+    params.update({name: model.params[name][0] for name in ("delta", "beta")})
+    return params
+
 def forecast_aqi(model, hours=48):
     """Generate AQI forecast for the next 'hours' using the trained model."""
-    future_dates = model.make_future_dataframe(periods=hours, freq='H')
+    # Only the future rows are predicted; the history is not needed for the forecast.
+    # Models not fitted by train_prophet_model start after their last fitted timestamp
+    history_end = getattr(model, "history_end", model.history["ds"].max())
+    future_dates = pd.DataFrame({"ds": pd.date_range(history_end, periods=hours + 1, freq='h')[1:]})
     forecast = model.predict(future_dates)
+    if not model.uncertainty_samples:
+        add_analytic_intervals(model, forecast)
     
 
     forecast_df = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(hours)
     forecast_df.columns = ["Datetime", "Forecasted AQI", "Lower Bound", "Upper Bound"]
     
     return forecast_df
+
+def add_analytic_intervals(model, forecast):
+    """Normal intervals from the fitted observation noise, for models fitted without sampling.
+
+    They ignore trend uncertainty, so they are somewhat narrower than simulated ones.
+    """
+    z = NormalDist().inv_cdf(0.5 + model.interval_width / 2)
+    # sigma_obs is fitted on the scaled series
+    half_width = z * model.params["sigma_obs"][0][0] * model.y_scale
+    forecast["yhat_lower"] = forecast["yhat"] - half_width
+    forecast["yhat_upper"] = forecast["yhat"] + half_width
+
+def save_model(model, path):
+    """Serialize a fitted model to JSON, replacing any previous file atomically."""
+    attributes = model_to_dict(model)
+    # Not one of Prophet's own attributes, so it is stored alongside them
+    attributes["history_end"] = model.history_end.isoformat()
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as f:
+        json.dump(attributes, f)
+
+def load_model(path):
+    with open(path) as f:
+        attributes = json.load(f)
+    model = model_from_dict(attributes)
+    # Files written before the end of the history was stored fall back to the last fitted timestamp
+    model.history_end = pd.Timestamp(attributes.get("history_end", model.history["ds"].max()))
+    return model
+
+def _model_prefix(name, profile):
+    # Column names such as "PM2.5 (μg/m³)" are not safe file names
+    return f"{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')}-{profile}-"
+
+def model_path(version, cache_dir=MODEL_CACHE_DIR, name="AQI", profile="full"):
+    key = hashlib.sha1(str(version).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{_model_prefix(name, profile)}{key}.json")
+
+def prune_models(cache_dir=MODEL_CACHE_DIR, name="AQI", profile="full", keep=KEEP_MODELS):
+    """Delete all but the ``keep`` most recently written models of one target and profile."""
+    prefix = _model_prefix(name, profile)
+    try:
+        paths = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if f.startswith(prefix) and f.endswith(".json")]
+    except FileNotFoundError:
+        return
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Pruned concurrently by another process
+
+def cached_prophet_model(data, version, cache_dir=MODEL_CACHE_DIR, previous=None, target="AQI", profile="full"):
+    """Fitted model for this dataset version, reusing a previous fit from disk.
+
+    Every forecast horizon is answered by the same fitted model, so changing
+    the horizon costs a predict call rather than a refit. If the version has
+    to be fitted and the model of an earlier version is given as ``previous``,
+    the fit is warm-started from its parameters.
+    """
+    path = model_path(version, cache_dir, target, profile)
+    if os.path.exists(path):
+        try:
+            return load_model(path)
+        except (OSError, ValueError):
+            pass  # Unreadable cache file: fit again and overwrite it
+
+    init = warm_start_params(previous) if previous is not None else None
+    model = train_prophet_model(data, init, target, profile)
+    save_model(model, path)
+    # Every correction makes a new version; only the latest few can still be asked for
+    prune_models(cache_dir, target, profile)
+    return model
+
+def _forecast_target(task):
+    target, data, hours, version, cache_dir, profile = task
+    if version is None:
+        model = train_prophet_model(data, target=target, profile=profile)
+    else:
+        model = cached_prophet_model(data, version, cache_dir, target=target, profile=profile)
+
+    forecast = forecast_aqi(model, hours).reset_index(drop=True)
+    forecast.columns = ["Datetime", "Forecast", "Lower Bound", "Upper Bound"]
+    forecast.insert(0, "Series", target)
+    return forecast
+
+def forecast_targets(data, targets=None, hours=48, version=None, cache_dir=MODEL_CACHE_DIR, max_workers=None,
+                     profile="full"):
+    """Forecast each series in ``targets`` (default: all of them) ``hours`` ahead.
+
+    One Prophet model is fitted per series, in a process pool with one worker
+    per available core, so a full panel takes roughly as long as its slowest
+    series on a machine with enough cores. With a dataset ``version`` the
+    fitted models are cached on disk like ``cached_prophet_model`` does.
+
+    Returns one long frame with columns Series, Datetime, Forecast,
+    Lower Bound and Upper Bound.
+    """
+    targets = list(targets or FORECAST_TARGETS)
+    # Each worker only receives the two columns it fits on
+    tasks = [(target, data[[TIME_COLUMN, target]], hours, version, cache_dir, profile) for target in targets]
+
+    return pd.concat(run_tasks(_forecast_target, tasks, max_workers), ignore_index=True)
@@ -0,0 +1,84 @@
+"""Process-wide registry of pickled models.
+
+Each model file is deserialised once per process and shared by every session.
+A cheap ``stat`` on each lookup notices when a new artifact has been dropped
+in; the file is then hashed and, if its content changed, loaded and swapped in
+atomically. If the new file fails to load, the previous version keeps serving.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+MODEL_PATH = "model.pkl"
+
+logger = logging.getLogger(__name__)
+
+ModelVersion = namedtuple("ModelVersion", ["model", "version", "signature", "loaded_at"])
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current = {}
+        # Signatures of files that failed to load, so they are not retried on every call
+        self._failed = {}
+
+    def get(self, path=MODEL_PATH):
+        """The model at ``path``, reloading it if the file has changed."""
+        return self.current(path).model
+
+    def version(self, path=MODEL_PATH):
+        """Content hash of the model currently served for ``path``."""
+        return self.current(path).version
+
+    def current(self, path=MODEL_PATH):
+        """The ``ModelVersion`` currently served for ``path``."""
+        entry = self._current.get(path)
+        try:
+            signature = _signature(path)
+        except FileNotFoundError:
+            if entry is None:
+                raise
+            return entry
+
+        if entry is not None and (entry.signature == signature or self._failed.get(path) == signature):
+            return entry
+
+        with self._lock:
+            # Another thread may have loaded it while we waited
+            entry = self._current.get(path)
+            if entry is not None and entry.signature == signature:
+                return entry
+            return self._load(path, signature, entry)
+
+    def _load(self, path, signature, previous):
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            version = hashlib.sha256(content).hexdigest()[:12]
+
+            if previous is not None and previous.version == version:
+                # Touched but unchanged: keep the loaded object
+                entry = previous._replace(signature=signature)
+            else:
+                entry = ModelVersion(pickle.loads(content), version, signature, time.time())
+                logger.info("Loaded %s version %s", path, version)
+        except Exception:
+            if previous is None:
+                raise
+            logger.exception("Failed to load %s; keeping version %s", path, previous.version)
+            self._failed[path] = signature
+            return previous
+
+        self._current[path] = entry
+        self._failed.pop(path, None)
+        return entry
@@ -0,0 +1,205 @@
+"""Background precomputation of the AQI forecast.
+
+A scheduler thread wakes up every ``interval`` seconds, compares the dataset
+version (see ``utils.records.dataset_version``) with the one its published
+forecast was made from and, only if it changed, refits the forecasting
+backend (see ``models.forecasting``; Prophet fits are warm-started from the
+previous one) and predicts ``HORIZON_HOURS`` ahead. The result is published by swapping a single
+reference and by atomically replacing a Parquet file, so readers always see
+a complete forecast and pages just slice the horizon they need.
+
+The same loop can run as a separate worker process; the app then picks up
+the file it writes. Set ``FORECAST_WORKER=external`` for the app as well, so
+it only reads that file instead of also refitting in its own thread:
+
+    FORECAST_WORKER=external streamlit run app.py
+    python -m models.scheduler --every 600
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from models.forecasting import BACKENDS, get_backend
+from utils.files import atomic_write
+from utils.records import RecordStore, dataset_version, load_history
+from utils.store import STORE_PATH
+
+HORIZON_HOURS = 168
+REFRESH_SECONDS = int(os.environ.get("FORECAST_REFRESH_SECONDS", 600))
+FORECAST_PATH = os.path.join(".cache", "forecast", "AQI.parquet")
+# "thread": refit in a thread of the app process; "external": a separate worker refits
+FORECAST_WORKER = os.environ.get("FORECAST_WORKER", "thread")
+
+logger = logging.getLogger(__name__)
+
+# ``model`` names the backend and profile that produced the forecast
+Forecast = namedtuple("Forecast", ["frame", "version", "fitted_at", "model"])
+
+
+def write_forecast(forecast, path=FORECAST_PATH):
+    """Publish ``forecast`` to ``path``, replacing the previous file atomically."""
+    table = pa.Table.from_pandas(forecast.frame, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"version": forecast.version.encode(),
+        b"fitted_at": repr(forecast.fitted_at).encode(),
+        b"model": forecast.model.encode(),
+    })
+    with atomic_write(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+def read_forecast(path=FORECAST_PATH):
+    table = pq.read_table(path)
+    metadata = table.schema.metadata
+    return Forecast(
+        frame=table.to_pandas(),
+        version=metadata[b"version"].decode(),
+        fitted_at=float(metadata[b"fitted_at"]),
+        model=metadata.get(b"model", b"").decode(),
+    )
+
+
+class ForecastScheduler:
+    def __init__(self, record_store, interval=REFRESH_SECONDS, horizon=HORIZON_HOURS,
+                 store_path=STORE_PATH, path=FORECAST_PATH, backend=None, profile="full", worker=FORECAST_WORKER):
+        self.record_store = record_store
+        self.interval = interval
+        self.horizon = horizon
+        self.store_path = store_path
+        self.path = path
+        self.backend = backend or get_backend()
+        self.profile = profile
+        self.model_name = f"{self.backend.name}:{profile}"
+        self.worker = worker
+        self.error = None
+
+        self._published = None
+        self._model = None
+        self._file_signature = None
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the refresh loop in a daemon thread (idempotent).
+
+        Does nothing with an external worker: the scheduler then only reads the
+        file that worker publishes.
+        """
+        if self._thread is None and self.worker != "external":
+            self._thread = threading.Thread(target=self.run, name="forecast-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Check for new data now instead of at the next tick."""
+        self._wake.set()
+
+    def notify(self, version):
+        """Tell the scheduler the current dataset version; wakes it if the forecast is stale."""
+        published = self.latest()
+        if published is not None and published.version != version:
+            self.wake()
+
+    def latest(self, timeout=None):
+        """The most recent published forecast, or ``None`` if there is none yet.
+
+        With a ``timeout`` and a running refresh loop, waits up to that many
+        seconds for the first refresh; check ``error`` if it failed.
+        """
+        self._reload()
+        if self._published is None and timeout and self._thread is not None:
+            self._ready.wait(timeout)
+            self._reload()
+        return self._published
+
+    def run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as exc:
+                # Keep serving the last good forecast and try again next tick
+                self.error = exc
+                logger.exception("Forecast refresh failed")
+            # Waiting readers stop waiting after the first attempt, successful or not
+            self._ready.set()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self):
+        """Refit and republish if the dataset changed; returns whether it did."""
+        version = dataset_version(self.record_store, self.store_path)
+        published = self.latest()
+        if published is not None and (published.version, published.model) == (version, self.model_name):
+            return False
+
+        data = load_history(self.record_store, self.store_path)
+        if data.empty:
+            return False
+
+        # Appended hours barely move the optimum, so start from the last fit
+        model = self.backend.fit(data, version, previous=self._previous_model(published), profile=self.profile)
+        self._model = model
+        frame = self.backend.forecast(model, self.horizon).reset_index(drop=True)
+        forecast = Forecast(frame, version, time.time(), self.model_name)
+        write_forecast(forecast, self.path)
+        self._publish(forecast, self._signature())
+        self.error = None
+        return True
+
+    def _previous_model(self, published):
+        if self._model is not None or published is None or published.model != self.model_name:
+            return self._model
+        # After a restart, the model behind the published forecast may still be cached
+        return self.backend.load(published.version, profile=self.profile)
+
+    def _publish(self, forecast, signature):
+        # One reference assignment: readers see either the old or the new forecast
+        self._published = forecast
+        self._file_signature = signature
+        self._ready.set()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload(self):
+        # Pick up forecasts written by a previous run or by a separate worker
+        signature = self._signature()
+        if signature is None or signature == self._file_signature:
+            return
+        try:
+            self._publish(read_forecast(self.path), signature)
+        except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+            self._file_signature = signature
+            logger.warning("Could not read published forecast %s", self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the AQI forecast whenever the data changes.")
+    parser.add_argument("--every", type=int, default=REFRESH_SECONDS, help="seconds between data checks")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None, help="forecasting backend")
+    parser.add_argument("--profile", choices=["full", "fast", "fastest"], default="full", help="Prophet speed/accuracy profile")
+    parser.add_argument("--once", action="store_true", help="refresh once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    scheduler = ForecastScheduler(RecordStore(), interval=args.every, backend=get_backend(args.backend), profile=args.profile)
+    if args.once:
+        print("Published new forecast" if scheduler.refresh() else "Forecast already up to date")
+    else:
+        scheduler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Command-line training pipeline for the AQI regressor.
+
+Replaces the notebook cell that produced ``model.pkl``. The history (with the
+record store laid over it) is split in time order with ``TimeSeriesSplit``,
+every candidate regressor is cross-validated with its folds spread over a
+process pool, and the candidate with the lowest mean MAE is refitted on all
+rows. With ``--tune``, the forest candidates first go through a budgeted
+successive-halving search (``models.tuning``) and are cross-validated with
+the parameters it picks. The result is written as a versioned artifact:
+
+    artifacts/aqi-<version>.pkl    the pickled regressor
+    artifacts/aqi-<version>.json   version, feature schema, CV metrics, data version
+
+With ``--publish`` the new pickle also replaces ``model.pkl`` atomically, which
+the app's model registry picks up without a restart. ``--every`` keeps the
+job running and retrains whenever the dataset version changes:
+
+    python -m models.train --publish
+    python -m models.train --tune --budget 900 --publish --every 86400
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import TimeSeriesSplit
+
+from models.batch import DEFAULT_FEATURES
+from models.candidates import candidate_models
+from models.parallel import run_tasks
+from models.registry import MODEL_PATH
+from models.tuning import SEARCH_SPACES, successive_halving
+from utils.files import atomic_write
+from utils.records import RecordStore, dataset_version, load_history
+
+ARTIFACT_DIR = "artifacts"
+TARGET = "AQI"
+
+
+def load_training_data(record_store, features=DEFAULT_FEATURES):
+    """Time-ordered feature frame and target, without rows that have gaps."""
+    data = load_history(record_store, columns=features + [TARGET]).dropna()
+    return data[features], data[TARGET]
+
+
+def _score_fold(task):
+    name, params, X, y, train_index, test_index = task
+    model = candidate_models()[name](n_jobs=1).set_params(**params)
+    model.fit(X.iloc[train_index], y.iloc[train_index])
+    predicted = model.predict(X.iloc[test_index])
+    actual = y.iloc[test_index]
+    return {
+        "mae": mean_absolute_error(actual, predicted),
+        "rmse": float(np.sqrt(mean_squared_error(actual, predicted))),
+        "r2": r2_score(actual, predicted),
+    }
+
+
+def cross_validate(X, y, names, n_splits=5, max_workers=None, params=None):
+    """Mean and per-fold metrics of each candidate over time-ordered folds.
+
+    ``params`` maps candidate names to parameters that override their defaults.
+    """
+    params = params or {}
+    splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    tasks = [(name, params.get(name, {}), X, y, train, test) for name in names for train, test in splits]
+
+    results = run_tasks(_score_fold, tasks, max_workers)
+
+    metrics = {}
+    for i, name in enumerate(names):
+        folds = results[i * n_splits:(i + 1) * n_splits]
+        metrics[name] = {key: float(np.mean([fold[key] for fold in folds])) for key in folds[0]}
+        metrics[name]["folds"] = folds
+    return metrics
+
+
+def package_versions():
+    versions = {}
+    for name in ["numpy", "pandas", "scikit-learn"]:
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def write_artifact(model, metadata, artifact_dir=ARTIFACT_DIR):
+    """Write the pickle and its JSON metadata; returns the pickle's path."""
+    os.makedirs(artifact_dir, exist_ok=True)
+    base = os.path.join(artifact_dir, f"aqi-{metadata['version']}")
+    with open(base + ".pkl", "wb") as f:
+        pickle.dump(model, f)
+    with open(base + ".json", "w") as f:
+        json.dump(metadata, f, indent=2)
+    return base + ".pkl"
+
+
+def publish(artifact_path, model_path=MODEL_PATH):
+    """Replace ``model_path`` with the artifact atomically."""
+    with atomic_write(model_path) as tmp_path:
+        shutil.copyfile(artifact_path, tmp_path)
+
+
+def train(record_store, candidates=None, n_splits=5, max_workers=None, artifact_dir=ARTIFACT_DIR,
+          tune_budget=None):
+    """Cross-validate, refit the best candidate on all rows and write its artifact.
+
+    With a ``tune_budget`` (seconds per searchable candidate), candidates with a
+    search space are tuned first.
+    """
+    data_version = dataset_version(record_store)
+    X, y = load_training_data(record_store)
+    names = candidates or list(candidate_models())
+
+    tuning, params = {}, {}
+    if tune_budget:
+        for name in names:
+            if name in SEARCH_SPACES:
+                tuning[name] = successive_halving(
+                    X, y, name, data_version, tune_budget, max_workers=max_workers,
+                    history_path=os.path.join(artifact_dir, "tuning-history.jsonl"),
+                )
+                params[name] = tuning[name]["params"]
+
+    metrics = cross_validate(X, y, names, n_splits, max_workers, params)
+    best = min(names, key=lambda name: metrics[name]["mae"])
+    model = candidate_models()[best](-1).set_params(**params.get(best, {}))
+    model.fit(X, y)
+
+    created = datetime.now(timezone.utc)
+    metadata = {
+        "version": f"{created:%Y%m%dT%H%M%SZ}-{hashlib.sha1(data_version.encode()).hexdigest()[:8]}",
+        "created_at": created.isoformat(),
+        "model": best,
+        "params": {key: repr(value) for key, value in model.get_params().items()},
+        "features": list(X.columns),
+        "target": TARGET,
+        "rows": len(X),
+        "data_version": data_version,
+        "cv": {"splitter": "TimeSeriesSplit", "n_splits": n_splits, "metrics": metrics},
+        "tuning": tuning,
+        "packages": package_versions(),
+    }
+    return write_artifact(model, metadata, artifact_dir), metadata
+
+
+def last_data_version(artifact_dir=ARTIFACT_DIR):
+    """Dataset version of the newest artifact, or ``None``."""
+    if not os.path.isdir(artifact_dir):
+        return None
+    names = sorted(name for name in os.listdir(artifact_dir) if name.endswith(".json"))
+    if not names:
+        return None
+    with open(os.path.join(artifact_dir, names[-1])) as f:
+        return json.load(f).get("data_version")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the AQI regressor with time-series cross-validation.")
+    parser.add_argument("--candidates", nargs="+", help="regressors to compare (default: all installed)")
+    parser.add_argument("--splits", type=int, default=5, help="TimeSeriesSplit folds")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--artifacts", default=ARTIFACT_DIR, help="directory for versioned artifacts")
+    parser.add_argument("--tune", action="store_true", help="tune the forest candidates first")
+    parser.add_argument("--budget", type=int, default=600, help="seconds of tuning per tuned candidate")
+    parser.add_argument("--publish", action="store_true", help=f"also replace {MODEL_PATH} with the new model")
+    parser.add_argument("--every", type=int, help="keep running, retraining every N seconds if the data changed")
+    args = parser.parse_args()
+
+    unknown = set(args.candidates or []) - set(candidate_models())
+    if unknown:
+        parser.error(f"unknown or unavailable candidates: {', '.join(sorted(unknown))}")
+
+    record_store = RecordStore()
+    while True:
+        # A scheduled run only retrains when the data has changed since the last artifact
+        if not args.every or dataset_version(record_store) != last_data_version(args.artifacts):
+            path, metadata = train(
+                record_store, args.candidates, args.splits, args.workers, args.artifacts,
+                tune_budget=args.budget if args.tune else None,
+            )
+            for name, scores in sorted(metadata["cv"]["metrics"].items(), key=lambda item: item[1]["mae"]):
+                print(f"{name:<28} MAE {scores['mae']:8.3f}  RMSE {scores['rmse']:8.3f}  R2 {scores['r2']:.4f}")
+            print(f"Wrote {path} ({metadata['model']})")
+            if args.publish:
+                publish(path)
+                print(f"Published to {MODEL_PATH}")
+        else:
+            print("Data unchanged since the last artifact")
+
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
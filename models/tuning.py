@@ -0,0 +1,182 @@
+"""Budgeted hyperparameter search for the forest regressors.
+
+Successive halving: a sample of configurations is scored with time-ordered
+cross-validation on a small budget (a strided subsample of each training fold
+and a few trees), the best third is promoted to three times the budget, and
+so on until the survivors are scored with every row and ``max_trees`` trees.
+Fold fits run in a process pool. The search stops starting new work once
+``budget_seconds`` have passed and returns the best configuration found so far.
+
+Every scored configuration is appended to a JSON-lines history. A later
+search on the same data reuses those scores instead of refitting, so an
+interrupted or over-budget search resumes where it stopped; on new data the
+previous best configurations are tried first.
+
+Among the configurations that end within ``tolerance`` of the best MAE, the
+one with the lowest inference cost (total depth over all trees, i.e. nodes
+visited per predicted row) wins.
+"""
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import TimeSeriesSplit
+
+from models.candidates import candidate_models
+from models.parallel import process_pool
+
+# Kept next to the training artifacts
+HISTORY_PATH = os.path.join("artifacts", "tuning-history.jsonl")
+
+SEARCH_SPACES = {
+    "RandomForestRegressor": {
+        "max_depth": [None, 8, 12, 16, 24],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.6, 0.33],
+        "max_samples": [None, 0.5],
+    },
+    "ExtraTreesRegressor": {
+        "max_depth": [None, 8, 12, 16, 24],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": [1.0, 0.6, 0.33],
+    },
+}
+
+
+def _key(candidate, params, n_estimators, stride, n_splits, data_version):
+    return json.dumps([candidate, params, n_estimators, stride, n_splits, data_version], sort_keys=True)
+
+
+def load_tuning_history(path=HISTORY_PATH):
+    """Scored configurations from earlier searches, in the order they were written."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _append_history(record, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def sample_configs(space, n, rng, seeds=()):
+    """``n`` distinct configurations: ``seeds`` first, then random draws from ``space``."""
+    configs = []
+    for params in seeds:
+        if params not in configs and len(configs) < n:
+            configs.append(params)
+    # A small grid can run out of distinct configurations
+    for _ in range(50 * n):
+        if len(configs) >= n:
+            break
+        params = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        if params not in configs:
+            configs.append(params)
+    return configs
+
+
+def _score_fold(task):
+    candidate, params, n_estimators, stride, X, y, train_index, test_index = task
+    model = candidate_models()[candidate](n_jobs=1).set_params(n_estimators=n_estimators, **params)
+    train_index = train_index[::-1][::stride][::-1]  # keep the most recent row of every fold
+    model.fit(X.iloc[train_index], y.iloc[train_index])
+    mae = mean_absolute_error(y.iloc[test_index], model.predict(X.iloc[test_index]))
+    cost = sum(tree.tree_.max_depth for tree in model.estimators_)
+    return mae, cost
+
+
+def successive_halving(X, y, candidate, data_version, budget_seconds=600, n_configs=27, eta=3, max_trees=300,
+                       n_splits=3, tolerance=0.01, history_path=HISTORY_PATH, max_workers=None, seed=42):
+    """Search ``SEARCH_SPACES[candidate]``; returns a dict with the chosen ``params`` and the search trace."""
+    deadline = time.monotonic() + budget_seconds
+    rng = np.random.default_rng(seed)
+    history = load_tuning_history(history_path)
+    scored = {record["key"]: record for record in history}
+
+    # Best configurations of earlier searches (on any data) are tried first
+    previous = sorted((r for r in history if r["candidate"] == candidate and r["stride"] == 1), key=lambda r: r["mae"])
+    configs = sample_configs(SEARCH_SPACES[candidate], n_configs, rng, [r["params"] for r in previous])
+
+    rungs = max(1, round(math.log(n_configs, eta)) + 1)
+    splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    trace, results = [], []
+    timed_out = False
+
+    pool = process_pool(max_workers)
+    try:
+        for rung in range(rungs):
+            stride = eta ** (rungs - 1 - rung)
+            n_estimators = max(10, max_trees // stride)
+
+            rung_results, pending = [], {}
+            for params in configs:
+                key = _key(candidate, params, n_estimators, stride, n_splits, data_version)
+                if key in scored:
+                    rung_results.append(scored[key])
+                    continue
+                futures = [
+                    pool.submit(_score_fold, (candidate, params, n_estimators, stride, X, y, train, test))
+                    for train, test in splits
+                ]
+                pending[key] = (params, futures, time.monotonic())
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                futures = [f for _, fs, _ in pending.values() for f in fs if not f.done()]
+                if futures:
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+                for key, (params, fs, started) in list(pending.items()):
+                    if all(f.done() for f in fs):
+                        folds = [f.result() for f in fs]
+                        record = {
+                            "key": key,
+                            "candidate": candidate,
+                            "params": params,
+                            "n_estimators": n_estimators,
+                            "stride": stride,
+                            "data_version": data_version,
+                            "mae": float(np.mean([mae for mae, _ in folds])),
+                            "cost": int(np.mean([cost for _, cost in folds])),
+                            "seconds": round(time.monotonic() - started, 2),
+                        }
+                        _append_history(record, history_path)
+                        scored[key] = record
+                        rung_results.append(record)
+                        del pending[key]
+
+            if timed_out:
+                break
+
+            rung_results.sort(key=lambda r: r["mae"])
+            trace.append({"rung": rung, "n_estimators": n_estimators, "stride": stride, "configs": len(rung_results)})
+            results = rung_results
+            configs = [r["params"] for r in rung_results[:max(1, len(rung_results) // eta)]]
+    finally:
+        # Over budget: drop the queued fits and return without waiting for the running
+        # ones. Those still finish in the background (and hold up interpreter exit), so
+        # the search returns on time but its workers can outlive it by one fit each
+        pool.shutdown(wait=not timed_out, cancel_futures=True)
+
+    if not results:
+        return {"params": {}, "trace": trace, "timed_out": timed_out}
+
+    # Cheapest configuration whose MAE is within tolerance of the best one at the last complete rung
+    best_mae = results[0]["mae"]
+    contenders = [r for r in results if r["mae"] <= best_mae * (1 + tolerance)]
+    chosen = min(contenders, key=lambda r: (r["cost"], r["mae"]))
+    return {
+        "params": {**chosen["params"], "n_estimators": chosen["n_estimators"]},
+        "mae": chosen["mae"],
+        "cost": chosen["cost"],
+        "trace": trace,
+        "timed_out": timed_out,
+    }
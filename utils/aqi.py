@@ -0,0 +1,121 @@
+"""AQI categories and pollutant sub-indices, vectorised over whole arrays.
+
+Category lookup is a binary search over the category upper bounds, and
+sub-indices use the US EPA breakpoint tables, so a full history is classified
+or recomputed in one pass instead of one Python call per row.
+"""
+import numpy as np
+import pandas as pd
+
+# Category upper bounds: an AQI belongs to the first category whose bound it does not exceed
+CATEGORY_BOUNDS = np.array([50, 100, 150, 200, 300])
+
+CATEGORIES = np.array([
+    "Good",
+    "Moderate",
+    "Unhealthy for Sensitive Groups",
+    "Unhealthy",
+    "Very Unhealthy",
+    "Hazardous",
+])
+
+# Chart colours (Visualize page)
+CATEGORY_COLORS = {
+    "Good": "#10B981",
+    "Moderate": "#FBBF24",
+    "Unhealthy for Sensitive Groups": "#F97316",
+    "Unhealthy": "#DC2626",
+    "Very Unhealthy": "#7C3AED",
+    "Hazardous": "#7F1D1D",
+}
+
+# Text and badge colours (Predict and Forecast pages)
+BADGE_COLORS = np.array(["green", "#CC9900", "orange", "red", "purple", "maroon"])
+
+ADVICE = np.array([
+    "Enjoy your day outside!",
+    "Reduce outdoor exercises!",
+    "Wear a mask outdoors. Close windows to avoid dirty air.",
+    "Everyone may experience health effects. Avoid outdoor activities.",
+    "Serious health risks. Stay indoors and use an air purifier if possible.",
+    "Health warning. Avoid going outside, wear a high-quality mask.",
+])
+
+EMOJI = np.array(["😊", "😐", "😷", "🚫", "⚠️", "☣️"])
+
+# AQI band shared by every pollutant table
+INDEX_LOW = np.array([0, 51, 101, 151, 201, 301])
+INDEX_HIGH = np.array([50, 100, 150, 200, 300, 500])
+
+# US EPA concentration breakpoints (low, high) per band, and the decimals
+# concentrations are truncated to before the lookup
+BREAKPOINTS = {
+    "PM2.5": (np.array([0.0, 9.1, 35.5, 55.5, 125.5, 225.5]), np.array([9.0, 35.4, 55.4, 125.4, 225.4, 325.4]), 1),
+    "PM10": (np.array([0, 55, 155, 255, 355, 425]), np.array([54, 154, 254, 354, 424, 604]), 0),
+    "CO": (np.array([0.0, 4.5, 9.5, 12.5, 15.5, 30.5]), np.array([4.4, 9.4, 12.4, 15.4, 30.4, 50.4]), 1),
+    "NO2": (np.array([0, 54, 101, 361, 650, 1250]), np.array([53, 100, 360, 649, 1249, 2049]), 0),
+    "SO2": (np.array([0, 36, 76, 186, 305, 605]), np.array([35, 75, 185, 304, 604, 1004]), 0),
+}
+
+# Dataset column for each pollutant, and the factor from μg/m³ to the
+# breakpoint unit (ppm for CO, ppb for NO2 and SO2, at 25 °C and 1 atm)
+POLLUTANT_COLUMNS = {
+    "PM2.5": ("PM2.5 (μg/m³)", 1.0),
+    "PM10": ("PM10 (μg/m³)", 1.0),
+    "CO": ("CO (μg/m³)", 24.45 / 28.01 / 1000),
+    "NO2": ("NO2 (μg/m³)", 24.45 / 46.01),
+    "SO2": ("SO2 (μg/m³)", 24.45 / 64.07),
+}
+
+
+def category_index(aqi):
+    """Category number (0 = Good ... 5 = Hazardous) for each AQI value."""
+    return np.searchsorted(CATEGORY_BOUNDS, np.asarray(aqi, dtype=float), side="left")
+
+
+def categorize(aqi):
+    """Category name for each AQI value (a plain string for scalar input)."""
+    names = CATEGORIES[category_index(aqi)]
+    return str(names) if np.ndim(names) == 0 else names
+
+
+def category_info(aqi):
+    """Category, badge colour, advice and emoji for a single AQI value."""
+    i = category_index(aqi)
+    return str(CATEGORIES[i]), str(BADGE_COLORS[i]), str(ADVICE[i]), str(EMOJI[i])
+
+
+def category_counts(aqi):
+    """Number of values per category, as a ``Category`` / ``Count`` frame."""
+    counts = np.bincount(category_index(aqi), minlength=len(CATEGORIES))
+    present = counts > 0
+    return pd.DataFrame({"Category": CATEGORIES[present], "Count": counts[present]})
+
+
+def sub_index(pollutant, concentration):
+    """EPA sub-index of ``pollutant`` for concentrations in its breakpoint unit.
+
+    Averaging (24 h for PM, 8 h for CO) is up to the caller; values above the
+    top breakpoint are capped at 500 and NaNs stay NaN.
+    """
+    low, high, decimals = BREAKPOINTS[pollutant]
+    scale = 10 ** decimals
+    c = np.floor(np.asarray(concentration, dtype=float) * scale) / scale
+
+    band = np.minimum(np.searchsorted(high, c, side="left"), len(high) - 1)
+    index = (INDEX_HIGH[band] - INDEX_LOW[band]) / (high[band] - low[band]) * (c - low[band]) + INDEX_LOW[band]
+    return np.minimum(np.round(index), 500)
+
+
+def sub_indices(data):
+    """Sub-index of every pollutant present in ``data`` (μg/m³ columns)."""
+    indices = {}
+    for pollutant, (column, factor) in POLLUTANT_COLUMNS.items():
+        if column in data.columns:
+            indices[pollutant] = sub_index(pollutant, data[column].to_numpy(dtype=float) * factor)
+    return pd.DataFrame(indices, index=data.index)
+
+
+def compute_aqi(data):
+    """Overall AQI (the highest pollutant sub-index) for each row of ``data``."""
+    return sub_indices(data).max(axis=1, skipna=True)
@@ -0,0 +1,31 @@
+"""Peak-preserving downsampling for time series charts."""
+import numpy as np
+
+# Roughly two points per horizontal pixel of a full-width chart
+CHART_POINTS = 2000
+
+
+def minmax_indices(y, max_points=CHART_POINTS):
+    """Indices of at most ``max_points`` samples of ``y`` that keep every peak.
+
+    The series is split into equal buckets and the minimum and maximum of each
+    bucket are kept, in their original order. Series that already fit are
+    returned whole.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max_points // 2
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    # NaN padding (and gaps) must never win the min or the max
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+
+    indices = np.unique(np.concatenate([lows, highs]))
+    return indices[indices < n]
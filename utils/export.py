@@ -0,0 +1,78 @@
+"""Chunked file exports for the download buttons.
+
+Exports are written chunk by chunk into a temporary file, so the writer only
+renders ``CHUNK_ROWS`` rows at a time, and only when the user actually asks
+for the file. This bounds the writer's own memory, not the download's:
+Streamlit reads the finished file into memory to serve it, so a download
+still costs about the size of the exported file.
+"""
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 5000
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def iter_chunks(data, positions=None, chunk_rows=CHUNK_ROWS):
+    """Yield ``data`` (or the rows at ``positions``) in frames of ``chunk_rows``."""
+    total = len(data) if positions is None else len(positions)
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            yield data.iloc[start:start + chunk_rows]
+        else:
+            yield data.iloc[positions[start:start + chunk_rows]]
+
+
+def write_csv(chunks, sink):
+    for i, chunk in enumerate(chunks):
+        sink.write(chunk.to_csv(index=False, header=i == 0).encode())
+
+
+def write_xlsx(chunks, sink):
+    # openpyxl is only loaded when someone actually exports to Excel
+    from openpyxl import Workbook
+
+    # Write-only workbooks stream rows to disk instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Air Quality")
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            sheet.append(list(chunk.columns))
+        # The store keeps values as float32; widen them through their shortest repr so
+        # 31.7 is written as 31.7 and not as 31.700000762939453
+        float32 = [column for column, dtype in chunk.dtypes.items() if dtype == "float32"]
+        chunk = chunk.assign(**{column: chunk[column].to_numpy().astype(str).astype("float64") for column in float32})
+        cells = chunk.astype(object).where(chunk.notna(), None)
+        for row in cells.itertuples(index=False, name=None):
+            sheet.append([value.item() if hasattr(value, "item") else value for value in row])
+    workbook.save(sink)
+
+
+def write_parquet(chunks, sink):
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+
+WRITERS = {"CSV": write_csv, "Excel": write_xlsx, "Parquet": write_parquet}
+
+
+def export_file(data, positions=None, fmt="CSV"):
+    """Write the selected rows in ``fmt`` and return the file's bytes."""
+    with tempfile.TemporaryFile() as sink:
+        WRITERS[fmt](iter_chunks(data, positions), sink)
+        sink.seek(0)
+        return sink.read()
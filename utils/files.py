@@ -0,0 +1,22 @@
+"""File helpers shared by the data store, the forecast and model caches and the training artifacts."""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path):
+    """Yield a temporary path to write to; it replaces ``path`` when the block succeeds.
+
+    Readers see either the previous file or the complete new one, never a
+    partial write. The parent directory is created if needed, and the
+    temporary file is removed if the block raises.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,97 @@
+"""Range queries over the time-sorted air quality frame."""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.store import TIME_COLUMN
+
+
+def date_bounds(data, start_date, end_date):
+    """Return the ``(start, stop)`` row positions covering ``start_date``..``end_date``.
+
+    Both dates are inclusive. ``data`` must be sorted on the timestamp column,
+    which ``utils.store`` guarantees, so this is two binary searches.
+    """
+    times = data[TIME_COLUMN]
+    start = times.searchsorted(pd.Timestamp(start_date), side="left")
+    stop = times.searchsorted(pd.Timestamp(end_date + timedelta(days=1)), side="left")
+    return int(start), int(stop)
+
+
+def date_range(data, start_date, end_date):
+    """Rows between two dates (inclusive) as a positional slice of ``data``."""
+    start, stop = date_bounds(data, start_date, end_date)
+    return data.iloc[start:stop]
+
+
+def filter_positions(data, start_date=None, end_date=None, value_ranges=None, hits=None):
+    """Positions of the rows matching every filter, without copying any rows.
+
+    ``value_ranges`` maps a column to an inclusive ``(low, high)`` pair and
+    ``hits`` is a sorted array of allowed positions (e.g. search results).
+    """
+    if start_date is not None and end_date is not None:
+        start, stop = date_bounds(data, start_date, end_date)
+    else:
+        start, stop = 0, len(data)
+
+    mask = np.ones(stop - start, dtype=bool)
+    for column, (low, high) in (value_ranges or {}).items():
+        values = data[column].to_numpy()[start:stop]
+        mask &= (values >= low) & (values <= high)
+
+    positions = np.flatnonzero(mask) + start
+    if hits is not None:
+        positions = np.intersect1d(positions, hits, assume_unique=True)
+    return positions
+
+
+def _smallest(values, k):
+    """Indices of the ``k`` smallest of ``values`` (no NaNs), sorted by value then index."""
+    if k <= 0:
+        return np.arange(0)
+    if k < len(values):
+        threshold = np.partition(values, k - 1)[k - 1]
+        below = np.flatnonzero(values < threshold)
+        # Ties at the threshold are taken in index order, as a stable sort would
+        tied = np.flatnonzero(values == threshold)[:k - len(below)]
+        chosen = np.concatenate([below, tied])
+    else:
+        chosen = np.arange(len(values))
+    return chosen[np.lexsort((chosen, values[chosen]))]
+
+
+def fetch_page(data, positions, offset, limit, sort_by=None, ascending=True):
+    """One page of the selected rows plus the total number of selected rows.
+
+    Only the sort key column is read for the whole selection; the other
+    columns are read for the ``limit`` rows on the page. Rows come in the
+    order of a stable sort on the key (missing values last, and the reverse
+    of that for descending), but only the rows up to the end of the page are
+    sorted.
+    """
+    total = len(positions)
+    stop = offset + limit
+    if sort_by == TIME_COLUMN:
+        # Positions are ascending and the frame is time-sorted, so no sort is needed
+        if not ascending:
+            positions = positions[::-1]
+        page = positions[offset:stop]
+    elif sort_by is not None:
+        keys = data[sort_by].to_numpy()[positions]
+        missing = pd.isna(keys)
+        if ascending:
+            valued = np.flatnonzero(~missing)
+            head = valued[_smallest(keys[valued], min(stop, len(valued)))]
+            order = np.concatenate([head, np.flatnonzero(missing)[:stop - len(head)]])
+        else:
+            # Missing values first, then the largest values; ties in reverse row order
+            nans = np.flatnonzero(missing)[::-1][:stop]
+            valued = np.flatnonzero(~missing)[::-1]
+            head = valued[_smallest(-keys[valued], min(stop - len(nans), len(valued)))]
+            order = np.concatenate([nans, head])
+        page = positions[order[offset:stop]]
+    else:
+        page = positions[offset:stop]
+    return data.iloc[page], total
@@ -0,0 +1,165 @@
+"""Persistent record store for measurements added or corrected in the app.
+
+Records live in an SQLite database (WAL mode) keyed by timestamp and are laid
+over the Arrow history from ``utils.store``: a record replaces the history row
+with the same timestamp. Every write bumps a version counter for the months it
+touches, so callers can cache per month and only reload what changed, and
+extends a running digest of all writes, so the dataset as a whole has a cheap
+version token (see ``dataset_version``).
+"""
+import hashlib
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from utils.store import SCHEMA, STORE_PATH, TIME_COLUMN, VALUE_COLUMNS, load_frame, store_signature
+
+DB_PATH = "air_quality.db"
+
+# SQL-safe names for the value columns
+SQL_COLUMNS = {
+    "PM10 (μg/m³)": "pm10",
+    "PM2.5 (μg/m³)": "pm25",
+    "CO (μg/m³)": "co",
+    "NO2 (μg/m³)": "no2",
+    "SO2 (μg/m³)": "so2",
+    "Temp (°C)": "temp",
+    "Humidity (%)": "humidity",
+    "Wind_Speed (km/h)": "wind_speed",
+    "Soil_Moisture (m³/m³)": "soil_moisture",
+    "AQI": "aqi",
+}
+
+
+def month_key(timestamps):
+    """Partition key (``YYYY-MM``) for each timestamp."""
+    return pd.DatetimeIndex(timestamps).strftime("%Y-%m")
+
+
+class RecordStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        fields = ", ".join(f"{name} REAL" for name in SQL_COLUMNS.values())
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS records (ts INTEGER PRIMARY KEY, month TEXT NOT NULL, {fields})")
+            conn.execute("CREATE INDEX IF NOT EXISTS records_month ON records (month)")
+            conn.execute("CREATE TABLE IF NOT EXISTS partitions (month TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS log (id INTEGER PRIMARY KEY CHECK (id = 0), writes INTEGER NOT NULL, digest TEXT NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO log VALUES (0, 0, '')")
+
+    def _connect(self):
+        # One short-lived connection per call; Streamlit serves sessions from many threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def upsert(self, rows):
+        """Insert ``rows`` (a frame of store columns) or update them in one transaction.
+
+        Only the value columns present in ``rows`` are written: an existing
+        record keeps its other fields, and a new one stores them as NULL.
+        Returns the partition keys that were touched.
+        """
+        if len(rows) == 0:
+            return []
+
+        times = pd.DatetimeIndex(rows[TIME_COLUMN]).astype("datetime64[ns]")
+        months = month_key(times)
+        columns = [column for column in VALUE_COLUMNS if column in rows.columns]
+        values = rows[columns].astype("float64")
+        values = values.astype(object).where(values.notna(), None)
+
+        names = [SQL_COLUMNS[column] for column in columns]
+        placeholders = ", ".join("?" * (len(names) + 2))
+        updates = ", ".join(f"{name}=excluded.{name}" for name in names)
+        conflict = f"DO UPDATE SET {updates}" if names else "DO NOTHING"
+        params = list(zip(times.asi8.tolist(), months, *(values[c].tolist() for c in columns)))
+
+        touched = sorted(set(months))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"INSERT INTO records ({', '.join(['ts', 'month'] + names)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(ts) {conflict}",
+                params,
+            )
+            conn.executemany(
+                "INSERT INTO partitions (month, version) VALUES (?, 1) "
+                "ON CONFLICT(month) DO UPDATE SET version = version + 1",
+                [(month,) for month in touched],
+            )
+            # Chain this write onto the digest of every earlier one
+            writes, digest = conn.execute("SELECT writes, digest FROM log").fetchone()
+            digest = hashlib.sha1((digest + repr((names, params))).encode()).hexdigest()
+            conn.execute("UPDATE log SET writes = ?, digest = ?", (writes + 1, digest))
+        return touched
+
+    def log_state(self):
+        """``(writes, digest)``: number of writes so far and the digest chained over them."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT writes, digest FROM log").fetchone()
+
+    def partition_versions(self):
+        """``(month, version)`` pairs for every partition that holds records."""
+        with closing(self._connect()) as conn:
+            return tuple(conn.execute("SELECT month, version FROM partitions ORDER BY month"))
+
+    def read_partition(self, month):
+        """All records of one month as a frame in the store schema."""
+        names = list(SQL_COLUMNS.values())
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT ts, {', '.join(names)} FROM records WHERE month = ? ORDER BY ts", (month,)
+            ).fetchall()
+
+        frame = pd.DataFrame(rows, columns=[TIME_COLUMN] + VALUE_COLUMNS)
+        frame[TIME_COLUMN] = pd.to_datetime(frame[TIME_COLUMN].astype("int64"), unit="ns")
+        for column in VALUE_COLUMNS:
+            frame[column] = frame[column].astype("float32")
+        return frame[SCHEMA.names]
+
+
+def dataset_version(record_store, store_path=STORE_PATH):
+    """Cheap token that changes whenever the history or the records change.
+
+    Built from the Arrow store's mtime and row count and the record store's
+    write digest, so computing it never touches the rows themselves.
+    """
+    mtime_ns, rows = store_signature(store_path)
+    writes, digest = record_store.log_state()
+    return f"{mtime_ns:x}-{rows}-{writes}-{digest[:12]}"
+
+
+def apply_records(base, records):
+    """Lay ``records`` over ``base``; records win on equal timestamps.
+
+    Both frames must be sorted on the timestamp column. The result stays sorted
+    and unique, so ``utils.query`` can keep binary-searching it.
+    """
+    if len(records) == 0:
+        return base
+
+    records = records[base.columns]
+    times = base[TIME_COLUMN].to_numpy()
+    new_times = records[TIME_COLUMN].to_numpy()
+
+    # Drop the base rows that records replace, then merge in timestamp order
+    positions = np.searchsorted(times, new_times)
+    in_bounds = positions < len(times)
+    replaced = positions[in_bounds][times[positions[in_bounds]] == new_times[in_bounds]]
+
+    kept = base.drop(index=base.index[replaced])
+    merged = pd.concat([kept, records], ignore_index=True)
+    return merged.sort_values(TIME_COLUMN, kind="stable", ignore_index=True)
+
+
+def load_history(record_store, store_path=STORE_PATH, columns=("AQI",)):
+    """History of ``columns`` with the record store laid over it, as the app sees it."""
+    base = load_frame(list(columns), store_path)
+    months = [month for month, _ in record_store.partition_versions()]
+    if not months:
+        return base
+    records = pd.concat([record_store.read_partition(month) for month in months], ignore_index=True)
+    return apply_records(base, records[base.columns])
@@ -0,0 +1,167 @@
+"""Precomputed daily / weekly / monthly rollups of the hourly history.
+
+Each level is a frame indexed by period start with ``(column, stat)`` columns
+holding sum, count, min, max and mean. Weekly and monthly levels are built from
+the daily level, so the hourly rows are only scanned once.
+
+When AQI is rolled up, two more daily frames count its values per histogram
+bin and per category, so the Statistics tab draws its distributions without
+rescanning the hourly rows.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.aqi import CATEGORIES, category_index
+from utils.query import date_range
+from utils.store import TIME_COLUMN, VALUE_COLUMNS
+
+STATS = ["sum", "count", "min", "max"]
+
+# How each stored stat combines when rolling days up into weeks and months
+COMBINE = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+# Width of the AQI histogram bins; bin ``i`` covers [i * width, (i + 1) * width)
+AQI_BIN_WIDTH = 20
+
+
+def _week_start(index):
+    return index - pd.to_timedelta(index.weekday, unit="D")
+
+
+def _month_start(index):
+    return index.to_period("M").to_timestamp()
+
+
+def _with_means(rollup):
+    for column in rollup.columns.get_level_values(0).unique():
+        rollup[(column, "mean")] = rollup[(column, "sum")] / rollup[(column, "count")]
+    return rollup.sort_index(axis=1)
+
+
+def _daily(data, columns):
+    days = data[TIME_COLUMN].dt.floor("D")
+    daily = data[columns].astype("float64").groupby(days).agg(STATS)
+    return _with_means(daily)
+
+
+def _daily_aqi_counts(data):
+    # Per-day counts of AQI values by histogram bin and by category; missing values are skipped
+    aqi = data["AQI"].to_numpy(dtype="float64")
+    valid = ~np.isnan(aqi)
+    days = data[TIME_COLUMN].dt.floor("D")[valid]
+    bins = pd.Series(np.floor(aqi[valid] / AQI_BIN_WIDTH).astype(np.int64), index=days.index)
+    categories = pd.Series(category_index(aqi[valid]), index=days.index)
+    bin_counts = bins.groupby([days, bins]).size().unstack(fill_value=0)
+    category_counts = categories.groupby([days, categories]).size().unstack(fill_value=0)
+    return bin_counts, category_counts.reindex(columns=range(len(CATEGORIES)), fill_value=0)
+
+
+def _replace_days(counts, days, fresh):
+    merged = pd.concat([counts.drop(days, errors="ignore")] + fresh).sort_index()
+    return merged.fillna(0).astype(np.int64).sort_index(axis=1)
+
+
+def _coarsen(daily, keys):
+    stored = [c for c in daily.columns if c[1] in COMBINE]
+    coarse = daily[stored].groupby(keys).agg({c: COMBINE[c[1]] for c in stored})
+    coarse.index.name = TIME_COLUMN
+    return _with_means(coarse)
+
+
+def build_rollups(data, columns=None):
+    """Build all rollup levels for ``columns`` (default: every value column)."""
+    if columns is None:
+        columns = [c for c in VALUE_COLUMNS if c in data.columns]
+
+    daily = _daily(data, columns)
+    rollups = {
+        "daily": daily,
+        "weekly": _coarsen(daily, _week_start(daily.index)),
+        "monthly": _coarsen(daily, _month_start(daily.index)),
+    }
+    if "AQI" in columns:
+        rollups["aqi_bins"], rollups["aqi_categories"] = _daily_aqi_counts(data)
+    return rollups
+
+
+def update_rollups(rollups, data, new_rows):
+    """Refresh the rollups after ``new_rows`` were written into ``data``.
+
+    Only the days touched by ``new_rows`` are rescanned from ``data`` (which
+    must already contain them); the weeks and months holding those days are
+    then recombined from the daily level. Works for corrections as well as
+    appends, since min/max of a touched day are recomputed rather than merged.
+    """
+    if len(new_rows) == 0:
+        return rollups
+
+    columns = list(rollups["daily"].columns.get_level_values(0).unique())
+    days = pd.DatetimeIndex(new_rows[TIME_COLUMN].dt.floor("D").unique()).sort_values()
+
+    rows = [date_range(data, day.date(), day.date()) for day in days]
+    fresh = [_daily(day_rows, columns) for day_rows in rows]
+    daily = pd.concat([rollups["daily"].drop(days, errors="ignore")] + fresh).sort_index()
+
+    updated = {"daily": daily}
+    for level, keys in (("weekly", _week_start), ("monthly", _month_start)):
+        touched = keys(days).unique()
+        in_touched = keys(daily.index).isin(touched)
+        rebuilt = _coarsen(daily[in_touched], keys(daily.index[in_touched]))
+        updated[level] = pd.concat([rollups[level].drop(touched, errors="ignore"), rebuilt]).sort_index()
+
+    if "aqi_bins" in rollups:
+        counts = [_daily_aqi_counts(day_rows) for day_rows in rows]
+        updated["aqi_bins"] = _replace_days(rollups["aqi_bins"], days, [bins for bins, _ in counts])
+        updated["aqi_categories"] = _replace_days(rollups["aqi_categories"], days, [categories for _, categories in counts])
+    return updated
+
+
+def _daily_slice(rollups, start_date, end_date):
+    daily = rollups["daily"]
+    start = daily.index.searchsorted(pd.Timestamp(start_date), side="left")
+    stop = daily.index.searchsorted(pd.Timestamp(end_date), side="right")
+    return daily.iloc[start:stop]
+
+
+def range_summary(rollups, column, start_date=None, end_date=None):
+    """Mean, min, max and count of ``column`` between two dates (inclusive).
+
+    Without dates the whole history is summarised from the monthly level.
+    """
+    if start_date is None and end_date is None:
+        rows = rollups["monthly"][column]
+    else:
+        rows = _daily_slice(rollups, start_date, end_date)[column]
+
+    count = rows["count"].sum()
+    return {
+        "mean": rows["sum"].sum() / count if count else float("nan"),
+        "min": rows["min"].min(),
+        "max": rows["max"].max(),
+        "count": int(count),
+    }
+
+
+def monthly_means(rollups, column, start_date, end_date):
+    """Monthly averages of ``column`` restricted to a date range, in date order."""
+    days = _daily_slice(rollups, start_date, end_date)[column]
+    months = days[["sum", "count"]].groupby(_month_start(days.index)).sum()
+
+    return pd.DataFrame({
+        "Month": months.index.strftime("%b %Y"),
+        column: (months["sum"] / months["count"]).values,
+    })
+
+
+def aqi_histogram(rollups):
+    """Whole-history AQI histogram as a ``Bin`` (bin start) / ``Count`` frame."""
+    counts = rollups["aqi_bins"].sum()
+    counts = counts[counts > 0]
+    return pd.DataFrame({"Bin": counts.index.to_numpy() * AQI_BIN_WIDTH, "Count": counts.to_numpy()})
+
+
+def aqi_category_counts(rollups):
+    """Whole-history number of AQI values per category, as a ``Category`` / ``Count`` frame."""
+    counts = rollups["aqi_categories"].sum().to_numpy()
+    present = counts > 0
+    return pd.DataFrame({"Category": CATEGORIES[present], "Count": counts[present]})
@@ -0,0 +1,196 @@
+"""Prebuilt search index for the Database tab.
+
+Rows are rendered to text once (timestamp plus every value, as the table shows
+them) and indexed by character trigram, so a literal substring query only
+verifies the rows that contain all of its trigrams. Queries such as
+``aqi>150`` or ``pm2.5:20..35`` are answered from per-column sorted values.
+
+The index is kept per calendar month (``MonthlySearchIndex``), like the record
+store's partitions, so a write only rebuilds the months it touched.
+"""
+import re
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.store import TIME_COLUMN
+
+# Separates fields in a row's text; never typed by users, so it can't match
+FIELD_SEPARATOR = "\x1f"
+
+NUMBER = r"-?\d+(?:\.\d+)?"
+RANGE_TERM = re.compile(
+    rf"(?P<column>[a-z][\w.]*)\s*(?:(?P<op>>=|<=|>|<|=)\s*(?P<value>{NUMBER})"
+    rf"|:\s*(?P<low>{NUMBER})\s*\.\.\s*(?P<high>{NUMBER}))"
+)
+
+
+def column_alias(column):
+    """Short query name for a column, e.g. ``PM2.5 (μg/m³)`` -> ``pm2.5``."""
+    return column.split(" (")[0].lower()
+
+
+def _pack_trigrams(codes, bits):
+    # Three code points of ``bits`` bits per key, in the smallest unsigned type that
+    # holds them (32 bits for the ASCII text rows render to); rows shorter than the
+    # window are zero-padded
+    dtype = np.uint32 if 3 * bits <= 32 else np.uint64
+    first, second, third = (part.astype(dtype) for part in (codes[:, :-2], codes[:, 1:-1], codes[:, 2:]))
+    keys = (first << (2 * bits)) | (second << bits) | third
+    return keys, third != 0
+
+
+class SearchIndex:
+    def __init__(self, data):
+        self.size = len(data)
+
+        fields = [data[TIME_COLUMN].astype(str)]
+        fields += [data[column].astype(str) for column in data.columns if column != TIME_COLUMN]
+        # Missing values (e.g. an unset field of a user record) leave their field empty
+        text = fields[0].str.cat(fields[1:], sep=FIELD_SEPARATOR, na_rep="").str.lower()
+        # Variable-width Arrow strings; candidates are verified against these
+        self.text = pa.array(text.to_numpy(dtype=object), type=pa.string())
+
+        # (trigram, row) pairs, deduplicated and sorted by trigram. The fixed-width
+        # code point matrix is only a temporary of this build
+        fixed = text.to_numpy(dtype=str)
+        width = max(fixed.dtype.itemsize // 4, 3)
+        codes = fixed.astype(f"U{width}").view(np.uint32).reshape(self.size, width)
+        self.bits = max(int(codes.max()).bit_length(), 1)
+        keys, valid = _pack_trigrams(codes, self.bits)
+        del fixed, codes
+        # A month's rows fit in 16 bits; larger frames fall back to 32
+        row_type = np.int16 if self.size <= np.iinfo(np.int16).max else np.int32
+        rows = np.broadcast_to(np.arange(self.size, dtype=row_type)[:, None], keys.shape)[valid]
+        keys = keys[valid]
+        order = np.lexsort((rows, keys))
+        keys, rows = keys[order], rows[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys, self.postings = keys[first], rows[first]
+
+        # Each distinct trigram once, with the start of its rows in ``postings``
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        self.trigrams = keys[starts]
+        self.starts = np.r_[starts, len(keys)].astype(np.int32)
+
+        # Sorted values per numeric column for range queries; NaNs are left out
+        self.numeric = {}
+        for column in data.columns:
+            if column == TIME_COLUMN:
+                continue
+            values = data[column].to_numpy()
+            order = np.argsort(values, kind="stable")
+            valid_count = int(np.count_nonzero(~np.isnan(values)))
+            self.numeric[column_alias(column)] = (values[order][:valid_count], order[:valid_count].astype(np.int32))
+
+    def _candidates(self, query):
+        codes = np.array([query]).view(np.uint32).reshape(1, -1)
+        if codes.max() >> self.bits:
+            # A character no row contains
+            return np.arange(0, dtype=np.int32)
+        keys = np.unique(_pack_trigrams(codes, self.bits)[0])
+
+        candidates = None
+        for key in keys:
+            i = np.searchsorted(self.trigrams, key)
+            if i == len(self.trigrams) or self.trigrams[i] != key:
+                return np.arange(0, dtype=self.postings.dtype)
+            rows = self.postings[self.starts[i]:self.starts[i + 1]]
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    def contains(self, query):
+        """Row positions whose text contains ``query`` literally (case-insensitive)."""
+        query = query.lower()
+        if len(query) < 3:
+            # Too short for a trigram lookup; fall back to a vectorised scan
+            return np.flatnonzero(pc.match_substring(self.text, query).to_numpy(zero_copy_only=False))
+
+        candidates = self._candidates(query)
+        matches = pc.match_substring(self.text.take(candidates), query).to_numpy(zero_copy_only=False)
+        return candidates[matches]
+
+    def value_range(self, column, low=-np.inf, high=np.inf, low_inclusive=True, high_inclusive=True):
+        """Row positions where ``low <= column <= high`` (bounds optionally exclusive)."""
+        values, order = self.numeric[column]
+        dtype = values.dtype.type
+        start = np.searchsorted(values, dtype(low), side="left" if low_inclusive else "right")
+        stop = np.searchsorted(values, dtype(high), side="right" if high_inclusive else "left")
+        return np.sort(order[start:stop])
+
+    def _range_term(self, match):
+        column = match["column"]
+        if column not in self.numeric:
+            raise KeyError(column)
+
+        if match["op"] is None:
+            return self.value_range(column, float(match["low"]), float(match["high"]))
+
+        value = float(match["value"])
+        if match["op"] == "=":
+            return self.value_range(column, value, value)
+        if match["op"] in (">", ">="):
+            return self.value_range(column, low=value, low_inclusive=match["op"] == ">=")
+        return self.value_range(column, high=value, high_inclusive=match["op"] == "<=")
+
+    def search(self, query):
+        """Row positions matching ``query``, in row order.
+
+        A query made only of range terms (``aqi>150 pm10:20..40``) matches rows
+        satisfying all of them; anything else is a literal substring search.
+        """
+        query = query.strip()
+        lowered = query.lower()
+        terms = list(RANGE_TERM.finditer(lowered))
+        leftover = RANGE_TERM.sub("", lowered).replace(",", "").strip()
+
+        if terms and not leftover:
+            try:
+                hits = None
+                for term in terms:
+                    rows = self._range_term(term)
+                    hits = rows if hits is None else np.intersect1d(hits, rows, assume_unique=True)
+                return hits
+            except KeyError:
+                pass  # Unknown column name: treat the query as plain text
+
+        return self.contains(query)
+
+
+def month_bounds(times):
+    """``(month, start, stop)`` row ranges of each calendar month in sorted ``times``."""
+    months = np.asarray(times, dtype="datetime64[ns]").astype("datetime64[M]")
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    stops = np.r_[starts[1:], len(months)]
+    return [(str(months[start]), int(start), int(stop)) for start, stop in zip(starts, stops)]
+
+
+class MonthlySearchIndex:
+    """A ``SearchIndex`` per calendar month of ``data``; positions refer to the whole frame.
+
+    A month's index is keyed on ``(base_token, partition_tokens.get(month))``.
+    Months whose key matches one in ``previous`` reuse its index instead of
+    being rebuilt, so after a write only the touched months are indexed again.
+    """
+
+    def __init__(self, data, base_token=None, partition_tokens=None, previous=None):
+        partition_tokens = partition_tokens or {}
+        reusable = previous.parts if previous is not None else {}
+        self.parts = {}
+        self.offsets = []
+        for month, start, stop in month_bounds(data[TIME_COLUMN]):
+            key = (base_token, partition_tokens.get(month))
+            cached = reusable.get(month)
+            if cached is None or cached[0] != key or cached[1].size != stop - start:
+                cached = (key, SearchIndex(data.iloc[start:stop]))
+            self.parts[month] = cached
+            self.offsets.append((start, cached[1]))
+
+    def search(self, query):
+        """Row positions matching ``query`` (see ``SearchIndex.search``), in row order."""
+        hits = [start + index.search(query).astype(np.int64) for start, index in self.offsets]
+        return np.concatenate(hits) if hits else np.arange(0)
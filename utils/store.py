@@ -0,0 +1,120 @@
+"""Columnar on-disk store for the Kathmandu air quality history.
+
+The history is kept in an uncompressed Arrow IPC file so it can be memory-mapped
+and read column by column, with an explicit float32 / datetime64 schema instead
+of whatever ``pd.read_csv`` infers.
+"""
+import argparse
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+from utils.files import atomic_write
+
+CSV_PATH = "Air_Quality_dataset_of_kathmandu_modified.csv"
+STORE_PATH = "Air_Quality_dataset_of_kathmandu.arrow"
+
+TIME_COLUMN = "Datetime"
+
+# Pollutant and weather columns, in the order the CSVs (and the model) use them
+VALUE_COLUMNS = [
+    "PM10 (μg/m³)",
+    "PM2.5 (μg/m³)",
+    "CO (μg/m³)",
+    "NO2 (μg/m³)",
+    "SO2 (μg/m³)",
+    "Temp (°C)",
+    "Humidity (%)",
+    "Wind_Speed (km/h)",
+    "Soil_Moisture (m³/m³)",
+    "AQI",
+]
+
+SCHEMA = pa.schema(
+    [pa.field(TIME_COLUMN, pa.timestamp("ns"), nullable=False)]
+    + [pa.field(column, pa.float32()) for column in VALUE_COLUMNS]
+)
+
+
+def read_csv(csv_path=CSV_PATH):
+    """Parse one of the bundled CSVs into a frame that follows SCHEMA."""
+    df = pd.read_csv(csv_path)
+
+    # The raw export splits the timestamp into Date and Time columns
+    if TIME_COLUMN not in df.columns:
+        df[TIME_COLUMN] = pd.to_datetime(df["Date"] + " " + df["Time"])
+        df = df.drop(columns=["Date", "Time"])
+
+    df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN]).astype("datetime64[ns]")
+    for column in VALUE_COLUMNS:
+        df[column] = df[column].astype("float32")
+
+    # Keep one row per timestamp, sorted, so range lookups can binary-search
+    df = df.sort_values(TIME_COLUMN, kind="stable")
+    df = df.drop_duplicates(TIME_COLUMN, keep="last")
+    return df[SCHEMA.names].reset_index(drop=True)
+
+
+def write_store(df, store_path=STORE_PATH):
+    """Write a frame to the Arrow store, replacing the previous file atomically."""
+    table = pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+    with atomic_write(store_path) as tmp_path, pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+
+
+def convert_csv(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """One-shot conversion of a CSV export into the Arrow store."""
+    df = read_csv(csv_path)
+    write_store(df, store_path)
+    return len(df)
+
+
+def load_frame(columns=None, store_path=STORE_PATH, csv_path=CSV_PATH):
+    """Load the history, optionally restricted to ``columns``.
+
+    The timestamp column is always included. If the store does not exist yet
+    it is built from the CSV first.
+    """
+    if columns is None:
+        columns = SCHEMA.names
+    else:
+        columns = [TIME_COLUMN] + [c for c in columns if c != TIME_COLUMN]
+
+    if not os.path.exists(store_path):
+        if not os.path.exists(csv_path):
+            return pd.DataFrame(columns=columns)
+        convert_csv(csv_path, store_path)
+
+    # Memory-map the file so only the requested columns are paged in
+    with pa.memory_map(store_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all().select(columns)
+        return table.to_pandas(split_blocks=True)
+
+
+def store_signature(store_path=STORE_PATH):
+    """``(mtime_ns, rows)`` of the Arrow store, read from file metadata only."""
+    if not os.path.exists(store_path):
+        return 0, 0
+
+    mtime_ns = os.stat(store_path).st_mtime_ns
+    with pa.memory_map(store_path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return mtime_ns, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an air quality CSV into the Arrow store.")
+    parser.add_argument("csv", nargs="?", default=CSV_PATH, help="CSV export to convert")
+    parser.add_argument("store", nargs="?", default=STORE_PATH, help="Arrow file to write")
+    args = parser.parse_args()
+
+    rows = convert_csv(args.csv, args.store)
+    print(f"Wrote {rows} rows to {args.store}")
+
+
+if __name__ == "__main__":
+    main()